@@ -1,9 +1,16 @@
 from abc import ABC
 from pyndoc.ast.read_handler import CompositeReadHandler, AtomReadHandler
 
+SPAN_COPY_LENGTH = 256  #: Spans of text shorter than this are copied into the contents of atom blocks at once
+
 
 class ASTBlock(ABC):
-    """Definition of a base AST block"""
+    """Definition of a base AST block.
+    Blocks define ``__slots__`` (and so should the blocks deriving from them), so that a large tree
+    does not keep a ``__dict__`` for each of its blocks
+    """
+
+    __slots__ = ()
 
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}()"
@@ -21,10 +28,107 @@ class ASTAtomBlock(ASTBlock, AtomReadHandler):
     :type contents: ``str``, optional
     """
 
+    __slots__ = ("_contents", "_metadata")
+
+    _shared_instances: dict = {}  #: Instances of the blocks without contents, shared by all trees
+
     def __init__(self, contents: str = "") -> None:
         """Constructor method"""
-        self.contents = contents
-        self.metadata = []
+        self._contents = contents  # a string, or a list of spans of texts (text, start, end)
+        self._metadata = None
+
+    @property
+    def contents(self) -> str:
+        """The contents of the Atom Block, spans added with ``append_span`` are copied when it is first read"""
+        contents = self._contents
+        if contents.__class__ is not str:
+            contents = self._contents = "".join([text[start:end] for text, start, end in contents])
+        return contents
+
+    @contents.setter
+    def contents(self, value: str) -> None:
+        self._contents = value
+
+    def append_span(self, text: str, start: int, end: int) -> None:
+        """Add a part of a text (e.g. of the parser's buffer) to the contents, without copying it.
+        The spans are only copied into the contents when they are read. Parts shorter than ``SPAN_COPY_LENGTH``
+        are copied at once, as keeping a span of them costs more
+
+        :param text: The text containing the added part
+        :type text: ``str``
+        :param start: The beginning of the part in the text
+        :type start: ``int``
+        :param end: The end of the part in the text
+        :type end: ``int``
+        """
+        if start >= end:
+            return
+        contents = self._contents
+        if contents.__class__ is str:
+            if len(contents) + end - start < SPAN_COPY_LENGTH:
+                self._contents = contents + text[start:end]
+                return
+            contents = self._contents = [(contents, 0, len(contents))] if contents else []
+        elif end - start < SPAN_COPY_LENGTH and contents[-1][2] - contents[-1][1] < SPAN_COPY_LENGTH:
+            last_text, last_start, last_end = contents[-1]
+            part = last_text[last_start:last_end] + text[start:end]
+            contents[-1] = (part, 0, len(part))
+            return
+        contents.append((text, start, end))
+
+    def spans(self) -> list[tuple[str, int, int]]:
+        """Get the contents as spans of texts, without copying them
+
+        :return: The spans forming the contents, as ``(text, start, end)``
+        :rtype: ``list[tuple[str, int, int]]``
+        """
+        if self._contents.__class__ is str:
+            return [(self._contents, 0, len(self._contents))] if self._contents else []
+        return list(self._contents)
+
+    def ending(self, length: int) -> str:
+        """Get the last characters of the contents, without copying the rest of it
+
+        :param length: The amount of characters
+        :type length: ``int``
+        :rtype: ``str``
+        """
+        if self._contents.__class__ is str:
+            return self._contents[max(0, len(self._contents) - length) :] if length > 0 else ""
+
+        parts = []
+        for text, start, end in reversed(self._contents):
+            if length <= 0:
+                break
+            parts.append(text[max(start, end - length) : end])
+            length -= end - start
+        return "".join(reversed(parts))
+
+    @classmethod
+    def shared(cls) -> "ASTAtomBlock":
+        """Get the instance of a block without contents (e.g. Space), which is shared by all trees,
+        so that a new one is not created for each occurrence of the block.
+        The shared instance must not be modified, its metadata is an empty tuple
+
+        :return: The shared instance of the block
+        """
+        instance = ASTAtomBlock._shared_instances.get(cls)
+        if instance is None:
+            instance = cls()
+            instance._metadata = ()
+            instance = ASTAtomBlock._shared_instances.setdefault(cls, instance)
+        return instance
+
+    @property
+    def metadata(self) -> list:
+        """The block's metadata, the list is only created when it is first used"""
+        if self._metadata is None:
+            self._metadata = []
+        return self._metadata
+
+    @metadata.setter
+    def metadata(self, value: list) -> None:
+        self._metadata = value
 
     def __eq__(self, other: object) -> bool:
         if isinstance(other, ASTAtomBlock):
@@ -39,22 +143,43 @@ class ASTAtomBlock(ASTBlock, AtomReadHandler):
 
 
 class ASTCompositeContents:
-    """The representation of a composite block's contents
+    """The representation of a composite block's contents.
+    Composite blocks keep their metadata and contents themselves, this is a view of them
+    (``block.contents``), so that both can be read and assigned as ``block.contents.metadata``
+    and ``block.contents.contents``
 
-    :param metadata: The block's special metadata
-    :type metadata: ``list``
-    :param contents: The contents of the class
-    :type contents: ``list[ASTBlock]``
+    :param block: The viewed block
+    :type block: ``ASTCompositeBlock``
     """
 
-    def __init__(self, metadata: list, contents: list[ASTBlock]) -> None:
-        self.metadata = metadata
-        self.contents = contents
+    __slots__ = ("_block",)
+
+    def __init__(self, block: "ASTCompositeBlock") -> None:
+        self._block = block
+
+    @property
+    def metadata(self) -> list:
+        """The block's special metadata"""
+        return self._block.metadata
+
+    @metadata.setter
+    def metadata(self, value: list) -> None:
+        self._block.metadata = value
+
+    @property
+    def contents(self) -> list[ASTBlock]:
+        """The blocks contained in the block"""
+        return self._block.blocks
+
+    @contents.setter
+    def contents(self, value: list[ASTBlock]) -> None:
+        self._block.blocks = value
 
 
 class ASTCompositeBlock(ASTBlock, CompositeReadHandler):
     """The definition of an AST Composite block.
     This block can hold both atom, and other composite blocks inside of it.
+    The contained blocks are kept in ``blocks``, the metadata list is only created when it is first used
 
     :param metadata: List of block's metadata
     :type metadata: ``list | None``
@@ -62,32 +187,45 @@ class ASTCompositeBlock(ASTBlock, CompositeReadHandler):
     :type contents: ``list | None``
     """
 
+    __slots__ = ("blocks", "_metadata")
+
     def __init__(self, metadata: list | None = None, contents: list | None = None) -> None:
-        metadata = metadata if metadata else []
-        contents = contents if contents else []
-        self.contents = ASTCompositeContents(metadata, contents)
+        self._metadata = metadata if metadata else None
+        self.blocks = contents if contents else []  #: The blocks contained in the block
+
+    @property
+    def metadata(self) -> list:
+        """The block's special metadata"""
+        if self._metadata is None:
+            self._metadata = []
+        return self._metadata
+
+    @metadata.setter
+    def metadata(self, value: list) -> None:
+        self._metadata = value
+
+    @property
+    def contents(self) -> ASTCompositeContents:
+        """The block's metadata and contents, as ``contents.metadata`` and ``contents.contents``"""
+        return ASTCompositeContents(self)
 
     def insert(self, block: ASTBlock) -> None:
         """Insert another AST Block into this one
         :param block: the other block object
         :type block: ASTBlock
         """
-        self.contents.contents.append(block)
+        self.blocks.append(block)
 
     def __str__(self) -> str:
         result_str = f"{self.__class__.__name__}: [\n  "
 
-        if self.contents.metadata:
-            result_str += f"Metadata: {[element.__str__() for element in self.contents.metadata]}\n  "
+        if self._metadata:
+            result_str += f"Metadata: {[element.__str__() for element in self._metadata]}\n  "
 
-        contents_str = "\n".join(
-            ["    " + str(block).replace("\n", "\n    ") + "," for block in self.contents.contents]
-        )
+        contents_str = "\n".join(["    " + str(block).replace("\n", "\n    ") + "," for block in self.blocks])
         result_str += (f"Contents: \n  [\n{contents_str}\n  ]," if contents_str else "Contents: None") + "\n]"
 
         return result_str
 
     def __repr__(self) -> str:
-        return (
-            f"{self.__class__.__name__}()" f"metadata={self.contents.metadata!r}, contents={self.contents.contents!r})"
-        )
+        return f"{self.__class__.__name__}()" f"metadata={self._metadata or []!r}, contents={self.blocks!r})"
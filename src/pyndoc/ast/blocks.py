@@ -4,6 +4,10 @@ from pyndoc.ast.basic_blocks import ASTAtomBlock, ASTCompositeBlock
 class Space(ASTAtomBlock):
     """AST Atom block representing whitespace"""
 
+    __slots__ = ()
+
+    has_content = False
+
     def __init__(self) -> None:
         super().__init__()
 
@@ -11,18 +15,37 @@ class Space(ASTAtomBlock):
 class Str(ASTAtomBlock):
     """special AST block representing string without whitespace characters"""
 
+    __slots__ = ()
+
     def __init__(self, contents: str = "") -> None:
         super().__init__(contents)
 
 
 class SoftBreak(ASTAtomBlock):
+    __slots__ = ()
+
+    has_content = False
+
     def __init__(self) -> None:
         super().__init__()
 
 
+class Text(ASTAtomBlock):
+    """AST Atom block representing a run of ``Str``, ``Space`` and ``SoftBreak`` blocks (in the text run mode),
+    spaces are kept in its contents as ``" "``, and soft breaks as ``"\\n"``
+    """
+
+    __slots__ = ()
+
+    def __init__(self, contents: str = "") -> None:
+        super().__init__(contents)
+
+
 class Header(ASTCompositeBlock):
     """AST block representing a heading"""
 
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__()
 
@@ -30,6 +53,8 @@ class Header(ASTCompositeBlock):
 class Para(ASTCompositeBlock):
     """AST block representing a paragraph."""
 
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__()
 
@@ -37,6 +62,8 @@ class Para(ASTCompositeBlock):
 class Emph(ASTCompositeBlock):
     """Basic Italic AST block"""
 
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__()
 
@@ -44,6 +71,8 @@ class Emph(ASTCompositeBlock):
 class Strong(ASTCompositeBlock):
     """Basic Bold AST block"""
 
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__()
 
@@ -51,11 +80,33 @@ class Strong(ASTCompositeBlock):
 class Code(ASTAtomBlock):
     """Basic Code AST block"""
 
+    __slots__ = ()
+
+    def __init__(self) -> None:
+        super().__init__()
+
+
+class Link(ASTCompositeBlock):
+    """Link AST block, the link's target is its metadata"""
+
+    __slots__ = ()
+
+    def __init__(self) -> None:
+        super().__init__()
+
+
+class Image(ASTCompositeBlock):
+    """Image AST block, the image's source is its metadata and its contents are the description"""
+
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__()
 
 
 class BulletList(ASTCompositeBlock):
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__()
 
@@ -63,11 +114,15 @@ class BulletList(ASTCompositeBlock):
 class OrderedList(ASTCompositeBlock):
     """Ordered List AST block"""
 
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__()
 
 
 class Plain(ASTCompositeBlock):
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__()
 
@@ -75,6 +130,8 @@ class Plain(ASTCompositeBlock):
 class Table(ASTCompositeBlock):
     """Table AST block"""
 
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__()
 
@@ -82,6 +139,8 @@ class Table(ASTCompositeBlock):
 class TableHead(ASTCompositeBlock):
     """Table Head AST block"""
 
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__()
 
@@ -89,6 +148,8 @@ class TableHead(ASTCompositeBlock):
 class TableBody(ASTCompositeBlock):
     """Table Body AST block"""
 
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__()
 
@@ -96,6 +157,8 @@ class TableBody(ASTCompositeBlock):
 class Row(ASTCompositeBlock):
     """Table Row AST block"""
 
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__()
 
@@ -103,6 +166,8 @@ class Row(ASTCompositeBlock):
 class Cell(ASTCompositeBlock):
     """Table Cell AST block"""
 
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__()
 
@@ -110,5 +175,7 @@ class Cell(ASTCompositeBlock):
 class CodeBlock(ASTAtomBlock):
     """Code block AST block"""
 
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__()
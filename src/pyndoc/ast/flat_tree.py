@@ -0,0 +1,220 @@
+from array import array
+from bisect import bisect_right
+from collections.abc import Iterable, Iterator
+from pyndoc.ast.basic_blocks import ASTBlock, ASTCompositeBlock
+
+NO_NODE = -1  #: The index used when a node has no parent, child or next sibling
+
+
+class FlatTree:
+    """An AST Tree kept in flat arrays instead of block objects, for documents too large
+    to keep a block object for every node.
+    Nodes are numbered in the order in which they are added (each block before its contents),
+    for each node the arrays hold its type id (an index in ``types``), the indices of its parent,
+    its first child and its next sibling (``NO_NODE`` if there is none), and the offset of its text
+    (the contents of an atom block) in the text of the tree - the text ends where the text of the next node
+    begins. Only the nodes with metadata have it kept
+
+    Iterating over the tree (or indexing it) gives read-only views of the top-level blocks, which
+    are instances of the blocks' types, so writers can process the tree the same way as an ``ASTTree``.
+    Views of the contained blocks are only created when they are accessed
+    """
+
+    def __init__(self, blocks: Iterable[ASTBlock] = ()) -> None:
+        self.types = []  #: Types of the blocks in the tree, by type id
+        self._type_ids = {}  #: Type ids, by block type
+        self.node_types = array("H")  #: Type id of each node
+        self.parents = array("i")  #: Index of the parent of each node
+        self.first_children = array("i")  #: Index of the first child of each node
+        self.next_siblings = array("i")  #: Index of the next sibling of each node
+        self.text_starts = array("q")  #: Offset of the beginning of each node's text
+        self.metadata = {}  #: Metadata of the nodes having any, by node index
+        self.roots = array("i")  #: Indices of the top-level nodes
+
+        self._texts = []  #: The text of the tree, a string for each top-level block
+        self._text_offsets = array("q")  #: Offset of each of the strings in the text of the tree
+        self._text_length = 0  #: Length of the text of the tree
+
+        for block in blocks:
+            self.append(block)
+
+    def append(self, block: ASTBlock) -> None:
+        """Add a top-level block (with all the blocks it contains) to the tree.
+        The block is not kept, it can be discarded afterwards
+
+        :param block: The added block
+        :type block: ``ASTBlock``
+        """
+        texts = []
+        text_end = self._text_length
+        last_children = {}  # the last child of each node added so far
+        if self.roots:
+            last_children[NO_NODE] = self.roots[-1]
+        self.roots.append(len(self.node_types))
+
+        stack = [(block, NO_NODE)]
+        while stack:
+            node, parent = stack.pop()
+            index = len(self.node_types)
+            self.node_types.append(self._type_id(node.__class__))
+            self.parents.append(parent)
+            self.first_children.append(NO_NODE)
+            self.next_siblings.append(NO_NODE)
+
+            previous = last_children.get(parent)
+            if previous is not None:
+                self.next_siblings[previous] = index
+            elif parent != NO_NODE:
+                self.first_children[parent] = index
+            last_children[parent] = index
+
+            if node._metadata:
+                self.metadata[index] = node._metadata
+
+            self.text_starts.append(text_end)
+            if isinstance(node, ASTCompositeBlock):
+                stack.extend((child, index) for child in reversed(node.blocks))
+            elif node.contents:
+                texts.append(node.contents)
+                text_end += len(node.contents)
+
+        self._texts.append("".join(texts))
+        self._text_offsets.append(self._text_length)
+        self._text_length = text_end
+
+    def extend(self, blocks: Iterable[ASTBlock]) -> None:
+        """Add top-level blocks to the tree
+
+        :param blocks: The added blocks
+        :type blocks: ``Iterable[ASTBlock]``
+        """
+        for block in blocks:
+            self.append(block)
+
+    def view(self, index: int) -> ASTBlock:
+        """Get a view of a node
+
+        :param index: The node's index
+        :type index: ``int``
+        :return: A read-only block, of the node's type
+        :rtype: ``ASTBlock``
+        """
+        cls = view_class(self.types[self.node_types[index]])
+        view = cls.__new__(cls)
+        view._tree = self
+        view._index = index
+        return view
+
+    def children(self, index: int) -> list[ASTBlock]:
+        """Get views of the blocks contained in a node
+
+        :param index: The node's index
+        :type index: ``int``
+        :rtype: ``list[ASTBlock]``
+        """
+        children = []
+        child = self.first_children[index]
+        while child != NO_NODE:
+            children.append(self.view(child))
+            child = self.next_siblings[child]
+        return children
+
+    def text(self, index: int) -> str:
+        """Get the text of a node (the contents of an atom block, empty for other blocks)
+
+        :param index: The node's index
+        :type index: ``int``
+        :rtype: ``str``
+        """
+        start = self.text_starts[index]
+        end = self.text_starts[index + 1] if index + 1 < len(self.text_starts) else self._text_length
+        if start == end:
+            return ""
+        root = bisect_right(self._text_offsets, start) - 1
+        offset = self._text_offsets[root]
+        return self._texts[root][start - offset : end - offset]
+
+    def _type_id(self, block_type: type) -> int:
+        """Get the id of a block type, adding it to the tree's types if needed"""
+        type_id = self._type_ids.get(block_type)
+        if type_id is None:
+            type_id = self._type_ids[block_type] = len(self.types)
+            self.types.append(block_type)
+        return type_id
+
+    def __len__(self) -> int:
+        return len(self.roots)
+
+    def __getitem__(self, index: int | slice) -> ASTBlock | list[ASTBlock]:
+        if isinstance(index, slice):
+            return [self.view(root) for root in self.roots[index]]
+        return self.view(self.roots[index])
+
+    def __iter__(self) -> Iterator[ASTBlock]:
+        return (self.view(root) for root in self.roots)
+
+    def __str__(self) -> str:
+        return "\n".join(["  " + str(block).replace("\n", "\n  ") + "," for block in self])
+
+
+class FlatBlock:
+    """Base of the views of blocks kept in a :class:`FlatTree`.
+    A view class derives from this class and from the viewed block's type, so the view is an instance of
+    the block's type, reading its contents and metadata from the tree
+    """
+
+    __slots__ = ()
+
+    @property
+    def _metadata(self) -> list | None:
+        return self._tree.metadata.get(self._index)
+
+    @property
+    def metadata(self) -> list:
+        """The block's metadata"""
+        return self._tree.metadata.get(self._index, [])
+
+    @property
+    def index(self) -> int:
+        """The index of the viewed node in the tree"""
+        return self._index
+
+
+class FlatAtomBlock(FlatBlock):
+    """Base of the views of atom blocks"""
+
+    __slots__ = ()
+
+    @property
+    def contents(self) -> str:
+        """The contents of the Atom Block"""
+        return self._tree.text(self._index)
+
+
+class FlatCompositeBlock(FlatBlock):
+    """Base of the views of composite blocks, ``contents`` of a view are the same as of a composite block"""
+
+    __slots__ = ()
+
+    @property
+    def blocks(self) -> list[ASTBlock]:
+        """Views of the blocks contained in the block"""
+        return self._tree.children(self._index)
+
+
+_view_classes = {}  #: View classes, by the viewed block type
+
+
+def view_class(block_type: type) -> type:
+    """Get the class of views of a block type, it has the same name and derives from the block type
+
+    :param block_type: The viewed block's type
+    :type block_type: ``type``
+    :rtype: ``type``
+    """
+    cls = _view_classes.get(block_type)
+    if cls is None:
+        base = FlatCompositeBlock if issubclass(block_type, ASTCompositeBlock) else FlatAtomBlock
+        namespace = {"__slots__": ("_tree", "_index"), "__module__": __name__, "__qualname__": block_type.__name__}
+        cls = _view_classes.setdefault(block_type, type(block_type)(block_type.__name__, (base, block_type), namespace))
+    return cls
@@ -2,17 +2,32 @@ import re
 
 from enum import Enum
 from collections import UserList
-from typing import TypedDict
+from typing import TYPE_CHECKING, TypedDict
+from typing_extensions import NotRequired
+
+if TYPE_CHECKING:
+    from pyndoc.readers.grammar import Grammar
 
 
 class StartParams(TypedDict):
     context: list
     token: str
+    grammar: "Grammar"
 
 
 class EndParams(TypedDict):
     context: list
     token: str
+    grammar: "Grammar"
+    pos: NotRequired[int]
+
+
+class ScanParams(TypedDict):
+    context: list
+    buffer: str
+    pos: int
+    endpos: int
+    grammar: "Grammar"
 
 
 class ProcessParams(TypedDict):
@@ -23,6 +38,7 @@ class ProcessParams(TypedDict):
 class AtomMatchParams(TypedDict):
     context: list
     text: str
+    grammar: "Grammar"
 
 
 class NumberingType(Enum):
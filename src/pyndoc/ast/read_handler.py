@@ -1,17 +1,22 @@
+from __future__ import annotations
 import pyndoc.ast.helpers as helpers
+from typing import TYPE_CHECKING
 from typing_extensions import Unpack
 import re
 
+if TYPE_CHECKING:
+    from pyndoc.readers.grammar import Grammar
+
 
 class CompositeReadHandler:
     """
     Class that is meant as a handler for reading logic for an AST Composite child.
     methods implemented here are defaults for
+    Patterns of a block are not stored in the class, they are taken from the parser's grammar,
+    passed to the methods as the ``grammar`` keyword argument
     """
 
-    start_pattern = ""  #: ``str``, The start pattern of a block, defaults to an empty string
-    end_pattern = ""  #: ``str``, The end pattern of a block, defaults to an empty string
-    inline = False  #: ``bool``, decides if the block is an inline
+    __slots__ = ()
 
     def process_read(self, **_: Unpack[helpers.ProcessParams]) -> None:
         """Process additional keyword arguments after block initialization.
@@ -29,9 +34,10 @@ class CompositeReadHandler:
             See below
         :Keyword Arguments:
             * *token* (``str``) -- the current token
+            * *grammar* (``Grammar``) -- the grammar of the parser's language
         """
         token = kwargs["token"]
-        match = re.search(cls.start_pattern, token)
+        match = kwargs["grammar"].start_pattern(cls).search(token)
         token = token[: match.start()] if match else token
         return (match, token)
 
@@ -45,46 +51,46 @@ class CompositeReadHandler:
 
         :Keyword Arguments:
             * token (``str``) -- string representing current token to be matched against pattern
+            * grammar (``Grammar``) -- the grammar of the parser's language
+            * pos (``int``, optional) -- index of the first character of the token, which was not checked
+              by this block before (the token before it did not match)
         """
         token = kwargs["token"]
-        match = re.search(cls.end_pattern, token)
+        match = kwargs["grammar"].search_end(cls, token, kwargs.get("pos", 0))
         token = token[match.end() :] if match else token
         return (match, token)
 
     @classmethod
-    def override_start(cls, pattern: str) -> None:
-        """Override the start pattern of an ASTCompositeBlock
-
-        :param pattern:
-            The new pattern of a block
-        :type pattern: str
-        """
-        cls.start_pattern = pattern
+    def scan_contents(cls, **kwargs: Unpack[helpers.ScanParams]) -> int:
+        r"""Consume the contents of a block at once, instead of one character at a time.
+        Called when the block is on top of the context stack and the token is empty,
+        returns the offset in the buffer up to which the contents were consumed.
+        By default nothing is consumed
 
-    @classmethod
-    def override_end(cls, pattern: str) -> None:
-        """Override the end pattern of an ASTCompositeBlock
+        :param \**kwargs:
+            See below
 
-        :param pattern:
-            The new pattern of a block
-        :type pattern: str
+        :Keyword Arguments:
+            * buffer (``str``) -- the input, not processed from ``pos``
+            * pos (``int``) -- index of the first unprocessed character of the buffer
+            * endpos (``int``) -- index, up to which the buffer can be consumed
+            * context (``list``) -- the context stack
+            * grammar (``Grammar``) -- the grammar of the parser's language
         """
-        cls.end_pattern = pattern
+        return kwargs["pos"]
 
     @classmethod
-    def override_inline(cls, value: bool) -> None:
-        """Override the inline boolean value of an ASTBlock
+    def end_patterns(cls, pattern: re.Pattern) -> dict[str, re.Pattern]:
+        """Get the end patterns of a block from its declared end pattern, used when compiling a grammar.
+        Blocks ending differently depending on the context can derive more patterns here
 
-        :param value:
-            The new value of the attribute
-        :type value: bool
+        :param pattern:
+            The declared end pattern
+        :type pattern: re.Pattern
+        :return: The patterns by name, the declared one is named ``end``
+        :rtype: dict[str, re.Pattern]
         """
-        cls.inline = value
-
-    @classmethod
-    def is_inline(cls) -> bool:
-        """Check if a given block type is inline, default: False"""
-        return cls.inline
+        return {"end": pattern}
 
     @classmethod
     def handle_premature_closure(cls, **kwargs: Unpack[helpers.EndParams]) -> str:
@@ -100,9 +106,9 @@ class CompositeReadHandler:
 
 
 class AtomReadHandler:
-    pattern = ""
-    start_pattern = ""
-    has_content = True
+    __slots__ = ()
+
+    has_content = True  #: ``bool``, decides if the block has contents
 
     @classmethod
     def match_pattern(cls, **kwargs: Unpack[helpers.AtomMatchParams]) -> tuple[re.Match | None, str]:
@@ -113,24 +119,39 @@ class AtomReadHandler:
             See below
 
         :Keyword Arguments:
-            * text (``str``) -- the token to be matched against the pattern attribute
+            * text (``str``) -- the token to be matched against the block's pattern
+            * context (``list``) -- the context stack
+            * grammar (``Grammar``) -- the grammar of the parser's language
         """
         text = kwargs["text"]
-        match = re.search(cls.pattern, text)
-        if match and len(text) != match.end():
+        if not cls.accepts(kwargs["context"]):
             return (None, text)
-        return (match, text)
+        return (cls.match_text(text, kwargs["grammar"]), text)
 
     @classmethod
-    def override_match_pattern(cls, pattern: str) -> None:
+    def match_text(cls, text: str, grammar: Grammar) -> re.Match | None:
+        """Match the whole text against the block's pattern, regardless of the context
+
+        :param text: The matched text
+        :type text: str
+        :param grammar: The grammar of the parser's language
+        :type grammar: Grammar
+        :return: The match, or None if the pattern does not match the whole text
+        :rtype: re.Match | None
         """
-        Set the match pattern to a new value
+        match = grammar.atom_pattern(cls).search(text)
+        if match and len(text) != match.end():
+            return None
+        return match
 
-        :param pattern:
-            The new pattern to be set
-        :type pattern: str
+    @classmethod
+    def accepts(cls, context: list) -> bool:
+        """Check if the block can be matched in a given context, default: True
+
+        :param context: The context stack
+        :type context: list
         """
-        cls.pattern = pattern
+        return True
 
     @classmethod
     def block_has_content(cls) -> bool:
@@ -140,14 +161,3 @@ class AtomReadHandler:
         :rtype: bool
         """
         return cls.has_content
-
-    @classmethod
-    def override_has_content(cls, value: bool) -> None:
-        """Change if a block can have contents, usually
-        set at runstart
-
-        :param value:
-            If the block can have contents
-        :type value: bool
-        """
-        cls.has_content = value
@@ -0,0 +1,81 @@
+import re
+from collections.abc import Iterable, Iterator
+from pyndoc.ast.basic_blocks import ASTBlock, ASTCompositeBlock
+from pyndoc.ast.blocks import Space, Str, SoftBreak, Text
+
+run_part_regex = re.compile(r"[^ \n]+| |\n")  #: Splits the contents of a ``Text`` block into its blocks
+
+_run_kinds = {}  #: How each block type is kept in a run: its contents (True), a string, or not at all (None)
+
+
+def _run_kind(block_type: type) -> bool | str | None:
+    """Get how blocks of a type are kept in a run of text"""
+    if block_type not in _run_kinds:
+        if issubclass(block_type, Text):
+            kind = None
+        elif issubclass(block_type, Str):
+            kind = True
+        elif issubclass(block_type, Space):
+            kind = " "
+        elif issubclass(block_type, SoftBreak):
+            kind = "\n"
+        else:
+            kind = None
+        _run_kinds[block_type] = kind
+    return _run_kinds[block_type]
+
+
+def coalesce(block: ASTBlock) -> None:
+    """Replace each run of consecutive ``Str``, ``Space`` and ``SoftBreak`` blocks contained in a block
+    (or in any of the blocks within it) with a single ``Text`` block, in place
+
+    :param block: The processed block
+    :type block: ``ASTBlock``
+    """
+    stack = [block]
+    while stack:
+        node = stack.pop()
+        if not isinstance(node, ASTCompositeBlock):
+            continue
+
+        blocks = []
+        run = []
+        previous_kind = None
+        for child in node.blocks:
+            kind = _run_kind(child.__class__)
+            # adjacent Str blocks are kept in separate runs, so that they are not joined when the runs are expanded
+            if run and (kind is None or kind is True and previous_kind is True):
+                blocks.append(Text("".join(run)))
+                run = []
+            if kind is None:
+                blocks.append(child)
+                stack.append(child)
+            else:
+                run.append(child.contents if kind is True else kind)
+            previous_kind = kind
+        if run:
+            blocks.append(Text("".join(run)))
+        node.blocks = blocks
+
+
+def expand(blocks: Iterable[ASTBlock]) -> Iterator[ASTBlock]:
+    """Iterate over blocks, replacing each ``Text`` block with the ``Str``, ``Space`` and ``SoftBreak`` blocks
+    it was made of, for the code processing these blocks one by one.
+    The contents of the other blocks are not expanded, ``expand`` should be used for them as well
+
+    :param blocks: The contents of a block, or the blocks of a tree
+    :type blocks: ``Iterable[ASTBlock]``
+    :return: The blocks, with the runs of text expanded
+    :rtype: ``Iterator[ASTBlock]``
+    """
+    for block in blocks:
+        if not isinstance(block, Text):
+            yield block
+            continue
+        for part in run_part_regex.findall(block.contents):
+            if part == " ":
+                yield Space.shared()
+            elif part == "\n":
+                yield SoftBreak.shared()
+            else:
+                yield Str(part)
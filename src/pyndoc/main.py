@@ -14,6 +14,12 @@ def main() -> None:
     parser.add_argument("-t", "--to", dest="to_format", help="Target format")
     parser.add_argument("file", help="Input file")
     parser.add_argument("-o", "--output", dest="output", default=None, help="Output file (optional)")
+    parser.add_argument(
+        "--flat", action="store_true", help="Keep the document in flat arrays, using less memory for large files"
+    )
+    parser.add_argument(
+        "--text-runs", action="store_true", help="Keep runs of words and spaces as single blocks of text"
+    )
 
     args = parser.parse_args()
 
@@ -30,7 +36,7 @@ def main() -> None:
         if not from_format:
             raise ValueError("Could not determine the source format from the file extension.")
 
-        r = reader.Reader(from_format)
+        r = reader.Reader(from_format, flat=args.flat, text_runs=args.text_runs)
         r.read(input_file)
 
         ast_tree = r._parser._tree
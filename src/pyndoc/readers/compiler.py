@@ -0,0 +1,445 @@
+import os
+import sys
+import glob
+import hashlib
+import importlib.util
+from functools import lru_cache
+from types import ModuleType
+from pyndoc.ast.read_handler import CompositeReadHandler, AtomReadHandler
+from pyndoc.readers.grammar import Grammar, load_grammar
+
+CACHE_ENV = "PYNDOC_CACHE_DIR"  #: Environment variable overriding the directory of compiled grammars
+
+
+def cache_dir() -> str:
+    """Get the directory in which compiled grammars are cached,
+    ``$PYNDOC_CACHE_DIR`` or ``pyndoc`` in the user's cache directory
+
+    :rtype: ``str``
+    """
+    if os.environ.get(CACHE_ENV):
+        return os.environ[CACHE_ENV]
+    return os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "pyndoc")
+
+
+def source_key(grammar: Grammar) -> str:
+    """Get the key of a grammar's compiled module - a hash of the sources it is generated from:
+    the language's ``tokens.py``, the modules of its blocks, the parser and the compiler
+
+    :param grammar: The compiled grammar
+    :type grammar: ``Grammar``
+    :rtype: ``str``
+    """
+    modules = {f"pyndoc.readers.{grammar.lang}.tokens", __name__, "pyndoc.readers.parser", "pyndoc.readers.grammar"}
+    for block in _known_blocks(grammar):
+        modules.update(base.__module__ for base in block.__mro__ if base is not object)
+
+    digest = hashlib.sha256(f"{grammar.lang}\n{sys.version_info[:2]}\n".encode())
+    for name in sorted(modules):
+        filename = getattr(sys.modules.get(name), "__file__", None)
+        if filename and os.path.isfile(filename):
+            with open(filename, "rb") as fp:
+                digest.update(fp.read())
+    return digest.hexdigest()[:16]
+
+
+def compiled_path(grammar: Grammar) -> str:
+    """Get the path of a grammar's compiled module in the cache
+
+    :param grammar: The compiled grammar
+    :type grammar: ``Grammar``
+    :rtype: ``str``
+    """
+    return os.path.join(cache_dir(), f"{_module_prefix(grammar)}{source_key(grammar)}.py")
+
+
+def _module_prefix(grammar: Grammar) -> str:
+    """Get the beginning of the names of a grammar's compiled modules, generated for the running interpreter.
+    Interpreters sharing the cache (e.g. of different Python versions) keep their modules separately
+    """
+    return f"{grammar.lang}_parser_{sys.implementation.cache_tag or sys.implementation.name}_"
+
+
+@lru_cache(maxsize=None)
+def load_compiled(lang: str) -> ModuleType:
+    """Get the compiled parser module of a language, it is loaded once per process.
+    The module is generated and saved in the cache, if it is not there yet
+    (if the cache can not be written, the generated module is only kept in memory)
+
+    :param lang: The grammar's language
+    :type lang: ``str``
+    :rtype: ``ModuleType``
+    """
+    grammar = load_grammar(lang)
+    filename = compiled_path(grammar)
+    try:
+        if not os.path.exists(filename):
+            write_compiled(grammar, filename)
+        spec = importlib.util.spec_from_file_location(f"pyndoc_compiled_{lang}", filename)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    except OSError:
+        # the cache can not be written, or the module was deleted by another process before it was loaded
+        module = ModuleType(f"pyndoc_compiled_{lang}")
+        exec(compile(generate_source(grammar), f"<compiled {lang} grammar>", "exec"), module.__dict__)
+    return module
+
+
+def write_compiled(grammar: Grammar, filename: str) -> None:
+    """Generate the parser module of a grammar and save it to a file, the file is replaced atomically.
+    Modules of the language generated for the same interpreter from older sources
+    (and their bytecode cached by ``importlib``) are deleted from the file's directory
+
+    :param grammar: The compiled grammar
+    :type grammar: ``Grammar``
+    :param filename: The module's file
+    :type filename: ``str``
+    """
+    directory = os.path.dirname(filename)
+    os.makedirs(directory, exist_ok=True)
+    temp_filename = f"{filename}.{os.getpid()}.tmp"
+    with open(temp_filename, "w", encoding="utf-8") as fp:
+        fp.write(generate_source(grammar))
+    os.replace(temp_filename, filename)
+
+    for stale in glob.glob(os.path.join(glob.escape(directory), f"{_module_prefix(grammar)}*.py")):
+        if os.path.abspath(stale) == os.path.abspath(filename):
+            continue
+        name = os.path.splitext(os.path.basename(stale))[0]
+        for path in [stale, *glob.glob(os.path.join(glob.escape(directory), "__pycache__", f"{name}.*.pyc"))]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def generate_source(grammar: Grammar) -> str:
+    """Generate the source of a parser module specialised for a grammar.
+    The module defines the methods of :class:`Parser` processing each character (``_scan``, ``check_end``,
+    ``check_start`` and ``check_atom_block``), with the loops over the grammar's blocks unrolled,
+    and default handlers (``start``, ``end``, ``match_text`` and ``accepts`` not overridden by a block)
+    replaced with the pattern checks they would do. Methods overridden by blocks are still called.
+    The methods are bound to a parser with the module's ``bind`` function, unless the parser's class overrides them
+
+    :param grammar: The compiled grammar
+    :type grammar: ``Grammar``
+    :return: The module's source
+    :rtype: ``str``
+    """
+    return _Generator(grammar).source()
+
+
+def _known_blocks(grammar: Grammar) -> list[type]:
+    """Get the blocks declared in a grammar - composite, atom blocks, blocks with declared ends and the atom wrapper"""
+    blocks = [*grammar.block_types, *grammar.atom_block_types, grammar.atom_wrapper]
+    blocks += [block for block in grammar.end_block_types if block not in blocks]
+    return list(dict.fromkeys(blocks))
+
+
+def _overrides(block: type, method: str, base: type) -> bool:
+    """Check if a block overrides a method of its read handler"""
+    return getattr(block, method).__func__ is not getattr(base, method).__func__
+
+
+class _Generator:
+    """Generates the source of a grammar's parser module, see ``generate_source``"""
+
+    def __init__(self, grammar: Grammar) -> None:
+        self.grammar = grammar
+        self.lines = []
+        self.modules = {}  #: Aliases of the modules of the blocks
+        self.names = {}  #: Names of the blocks in the generated module
+
+    def source(self) -> str:
+        grammar = self.grammar
+        for block in _known_blocks(grammar):
+            alias = self.modules.setdefault(block.__module__, f"_module_{len(self.modules)}")
+            self.names[block] = f"{alias}.{block.__qualname__}"
+
+        self.emit(f'"""The parser of the ``{grammar.lang}`` grammar, generated by ``pyndoc.readers.compiler``"""')
+        self.emit("# Generated from the grammar's declarations, do not edit")
+        self.emit("from types import MethodType")
+        self.emit("from pyndoc.ast.read_handler import CompositeReadHandler")
+        self.emit("from pyndoc.readers.grammar import load_grammar")
+        self.emit("from pyndoc.readers.parser import Parser")
+        for module, alias in self.modules.items():
+            self.emit(f"import {module} as {alias}")
+        self.emit()
+        self.emit(f"SOURCE_KEY = {source_key(grammar)!r}")
+        self.emit(f"GRAMMAR = load_grammar({grammar.lang!r})")
+        self.emit(f"WRAPPER = {self.names[grammar.atom_wrapper]}")
+        self.emit()
+
+        self.atom_constants()
+        self.match_text()
+        self.match_current()
+        self.first_accepted()
+        self.check_atom_block()
+        self.start_functions()
+        self.check_start()
+        self.check_end()
+        self.scan()
+        self.bind()
+        return "\n".join(self.lines) + "\n"
+
+    def emit(self, line: str = "", indent: int = 0) -> None:
+        self.lines.append("    " * indent + line if line else "")
+
+    def atom_constants(self) -> None:
+        """Patterns of the atom blocks, and caches of characters matching atoms of runs of characters"""
+        for index, atom in enumerate(self.grammar.atom_block_types):
+            self.emit(f"ATOM_{index} = {self.names[atom]}")
+            self.emit(f"ATOM_PATTERN_{index} = GRAMMAR.atom_pattern(ATOM_{index})")
+            if self.grammar.atom_runs[index]:
+                self.emit(f"RUN_{index} = {{}}  # whether characters match the atom")
+        self.emit()
+
+    def text_matches(self, index: int, text: str) -> str:
+        """An expression checking if a whole text matches an atom pattern (``match_text``)"""
+        atom = self.grammar.atom_block_types[index]
+        if _overrides(atom, "match_text", AtomReadHandler):
+            return f"ATOM_{index}.match_text({text}, GRAMMAR) is not None"
+        return f"_matches_whole(ATOM_PATTERN_{index}, {text})"
+
+    def accepts(self, index: int) -> str:
+        """A condition checking if an atom is accepted in the context, appended to another one"""
+        atom = self.grammar.atom_block_types[index]
+        if _overrides(atom, "accepts", AtomReadHandler):
+            return f" and ATOM_{index}.accepts(self.context)"
+        return ""
+
+    def match_text(self) -> None:
+        self.emit()
+        self.emit("def _matches_whole(pattern, text):")
+        self.emit('"""Check if a pattern matches a whole text, as ``match_text`` of an atom block does"""', 1)
+        self.emit("match = pattern.search(text)", 1)
+        self.emit("return match is not None and match.end() == len(text)", 1)
+        self.emit()
+        self.emit()
+        self.emit("def match_text(text):")
+        self.emit('"""Match a text against each atom pattern"""', 1)
+        self.emit("length = len(text)", 1)
+        self.emit("return (", 1)
+        for index, max_length in enumerate(self.grammar.atom_max_lengths):
+            check = self.text_matches(index, "text")
+            self.emit(f"length <= {max_length} and {check}," if max_length is not None else f"{check},", 2)
+        self.emit(")", 1)
+        self.emit()
+        self.emit()
+        self.emit('EMPTY_MATCHES = match_text("")')
+        self.emit()
+
+    def match_current(self) -> None:
+        self.emit()
+        self.emit("def match_current(self, matches_prev):")
+        self.emit('"""Match the current token against each atom pattern,', 1)
+        self.emit("knowing the matches of the token without its last character", 1)
+        self.emit('"""', 1)
+        self.emit("length = len(self._token_prefix) + self._token_end - self._token_start", 1)
+        self.emit("if not length:", 1)
+        self.emit("return EMPTY_MATCHES", 2)
+        self.emit("if self._token_end > self._token_start:", 1)
+        self.emit("char = self._buffer[self._token_end - 1]", 2)
+        self.emit("else:", 1)
+        self.emit("char = self._token_prefix[-1]", 2)
+
+        matches = []
+        for index, max_length in enumerate(self.grammar.atom_max_lengths):
+            if self.grammar.atom_runs[index]:
+                self.emit(f"matched_{index} = RUN_{index}.get(char)", 1)
+                self.emit(f"if matched_{index} is None:", 1)
+                self.emit(f"matched_{index} = RUN_{index}[char] = {self.text_matches(index, 'char')}", 2)
+                matches.append(f"matched_{index} and (length == 1 or matches_prev[{index}])")
+            elif max_length is not None:
+                matches.append(f"length <= {max_length} and {self.text_matches(index, 'self.token')}")
+            else:
+                matches.append(self.text_matches(index, "self.token"))
+        self.emit("return (", 1)
+        for match in matches:
+            self.emit(f"{match},", 2)
+        self.emit(")", 1)
+        self.emit()
+
+    def first_accepted(self) -> None:
+        self.emit()
+        self.emit("def first_accepted(self, matches):")
+        self.emit('"""Get the first atom block, which matches a token, and is accepted in the current context"""', 1)
+        for index in range(len(self.grammar.atom_block_types)):
+            self.emit(f"if matches[{index}]{self.accepts(index)}:", 1)
+            self.emit(f"return ATOM_{index}", 2)
+        self.emit("return None", 1)
+        self.emit()
+
+    def check_atom_block(self) -> None:
+        self.emit()
+        self.emit("def check_atom_block(self):")
+        self.emit('"""Check if an atom block has ended, see ``Parser.check_atom_block``"""', 1)
+        self.emit("length = len(self._token_prefix) + self._token_end - self._token_start", 1)
+        self.emit("version, cached_length, matches_prev = self._atom_matches", 1)
+        self.emit("if version != self._token_version or cached_length != length - 1:", 1)
+        self.emit("matches_prev = match_text(self.token[:-1])", 2)
+        self.emit("matches_cur = match_current(self, matches_prev)", 1)
+        for index in range(len(self.grammar.atom_block_types)):
+            self.emit(f"if not matches_cur[{index}] and matches_prev[{index}]{self.accepts(index)}:", 1)
+            self.emit("old_token, self.token = self.token[:-1], self.token[-1:]", 2)
+            self.emit("self._insert_atom_block(first_accepted(self, matches_prev), old_token)", 2)
+            self.emit("matches_prev = EMPTY_MATCHES", 2)
+            self.emit("matches_cur = match_current(self, matches_prev)", 2)
+        self.emit("length = len(self._token_prefix) + self._token_end - self._token_start", 1)
+        self.emit("self._atom_matches = (self._token_version, length, matches_cur)", 1)
+        self.emit()
+
+    def start_functions(self) -> None:
+        """Functions checking if each block has started, returning the match and the new token"""
+        for index, block in enumerate(self.grammar.block_types):
+            self.emit()
+            self.emit(f"def start_{index}(self):")
+            if _overrides(block, "start", CompositeReadHandler):
+                start = f"{self.names[block]}.start"
+                self.emit(f"return {start}(token=self.token, context=self.context, grammar=GRAMMAR)", 1)
+            else:
+                self.emit("token = self.token", 1)
+                self.emit(f"match = START_PATTERN_{index}.search(token)", 1)
+                self.emit("return (match, token[: match.start()] if match else token)", 1)
+            self.emit()
+
+        self.emit()
+        for index, block in enumerate(self.grammar.block_types):
+            if not _overrides(block, "start", CompositeReadHandler):
+                self.emit(f"START_PATTERN_{index} = GRAMMAR.start_pattern({self.names[block]})")
+        self.emit("STARTS = {")
+        for index, block in enumerate(self.grammar.block_types):
+            inline = self.grammar.is_inline(block)
+            self.emit(f"{self.names[block]}: (start_{index}, {inline}),", 1)
+        self.emit("}  # the start functions of blocks, and if they are inline")
+        self.emit()
+
+    def check_start(self) -> None:
+        self.emit()
+        self.emit("def start_candidates(self, char):")
+        self.emit('"""Get the start functions of blocks which can start in a token beginning with a character"""', 1)
+        self.emit("return tuple(", 1)
+        self.emit("(*STARTS[block], block, needles) for block, needles in self._get_start_candidates(char)", 2)
+        self.emit(")", 1)
+        self.emit()
+        self.emit()
+        self.emit("def check_start(self):")
+        self.emit('"""Check if a new block has just started, see ``Parser.check_start``"""', 1)
+        self.emit("first_char = self._token_prefix[:1] or self._buffer[self._token_start : self._token_start + 1]", 1)
+        self.emit("candidates = self._start_candidates.get(first_char)", 1)
+        self.emit("if candidates is None:", 1)
+        self.emit("candidates = self._start_candidates[first_char] = start_candidates(self, first_char)", 2)
+        self.emit()
+        self.emit("for start, inline, block, needles in candidates:", 1)
+        self.emit("if needles and not self._token_contains(needles):", 2)
+        self.emit("continue", 3)
+        self.emit("start_match, new_token = start(self)", 2)
+        self.emit("if not start_match:", 2)
+        self.emit("self.token = new_token", 3)
+        self.emit("continue", 3)
+        self.emit("if inline and not self.context:", 2)
+        self.emit("self.context.append(WRAPPER())", 3)
+        self.emit("else:", 2)
+        self.emit("self._process_atom_block(self.token[: start_match.start()])", 3)
+        self.emit("self.token = new_token", 2)
+        self.emit()
+        self.emit("self.context.append(block())", 2)
+        self.emit("self.context[-1].process_read(match=start_match, context=self.context)", 2)
+        self.emit("break", 2)
+        self.emit()
+
+    def check_end(self) -> None:
+        self.emit()
+        self.emit("def default_end(block_type):")
+        self.emit('"""Get the end pattern and window of a block using the default ``end``, None for other blocks"""', 1)
+        self.emit("if block_type.end.__func__ is not CompositeReadHandler.end.__func__:", 1)
+        self.emit("return None", 2)
+        self.emit("window = GRAMMAR.end_window(block_type)", 1)
+        self.emit("return (GRAMMAR.end_pattern(block_type), window) if window else None", 1)
+        self.emit()
+        self.emit()
+        self.emit("DEFAULT_ENDS = {")
+        for block in _known_blocks(self.grammar):
+            if not issubclass(block, CompositeReadHandler):
+                continue
+            window = self.grammar.end_window(block)
+            if _overrides(block, "end", CompositeReadHandler) or not window:
+                self.emit(f"{self.names[block]}: None,", 1)
+            else:
+                self.emit(f"{self.names[block]}: (GRAMMAR.end_pattern({self.names[block]}), {window}),", 1)
+        self.emit("}  # the end patterns and windows of blocks using the default end, checked in the buffer")
+        self.emit()
+        self.emit()
+        self.emit("def check_end(self):")
+        self.emit('"""Check if the current context block has ended, see ``Parser.check_end``"""', 1)
+        self.emit("context = self.context", 1)
+        self.emit("if context:", 1)
+        self.emit("block = context[-1]", 2)
+        self.emit("block_type = block.__class__", 2)
+        self.emit("else:", 1)
+        self.emit("block = block_type = WRAPPER", 2)
+        self.emit("checked_block, checked_version, checked_length = self._end_checked", 1)
+        self.emit("pos = checked_length if block is checked_block and checked_version == self._token_version else 0", 1)
+        self.emit()
+        self.emit("if block_type in DEFAULT_ENDS:", 1)
+        self.emit("end = DEFAULT_ENDS[block_type]", 2)
+        self.emit("else:", 1)
+        self.emit("end = DEFAULT_ENDS[block_type] = default_end(block_type)", 2)
+        self.emit("if end and not self._token_prefix:", 1)
+        self.emit("pattern, window = end", 2)
+        self.emit("start = self._token_start", 2)
+        self.emit("match = pattern.search(self._buffer, max(start, start + pos + 1 - window), self._token_end)", 2)
+        self.emit("if not match:", 2)
+        self.emit("self._end_checked = (block, self._token_version, self._token_end - start)", 3)
+        self.emit("return", 3)
+        self.emit("self._process_atom_block(self._buffer[start : match.start()])", 2)
+        self.emit("self.token = self._buffer[match.end() : self._token_end]", 2)
+        self.emit("self._end()", 2)
+        self.emit("return", 2)
+        self.emit()
+        self.emit("end_match, new_token = block.end(token=self.token, context=context, grammar=GRAMMAR, pos=pos)", 1)
+        self.emit("if not end_match:", 1)
+        self.emit("self.token = new_token", 2)
+        self.emit("self._end_checked = (block, self._token_version, len(new_token))", 2)
+        self.emit("return", 2)
+        self.emit("self._process_atom_block(self.token[: end_match.start()])", 1)
+        self.emit("self.token = new_token", 1)
+        self.emit("self._end()", 1)
+        self.emit()
+
+    def scan(self) -> None:
+        self.emit()
+        self.emit("def scan(self, text):")
+        self.emit('"""Append a text to the buffer, then process it character by character, see ``Parser._scan``"""', 1)
+        self.emit("self._buffer = self._buffer[self._token_start : self._token_end] + text", 1)
+        self.emit("self._token_start, self._token_end = 0, self._token_end - self._token_start", 1)
+        self.emit("while self._token_end < len(self._buffer):", 1)
+        self.emit("if self._token_start == self._token_end and self.context and not self._token_prefix:", 2)
+        self.emit("end = self._scan_contents(self._buffer, self._token_end, len(self._buffer))", 3)
+        self.emit("self._token_start = self._token_end = end", 3)
+        self.emit("if self._token_end == len(self._buffer):", 3)
+        self.emit("break", 4)
+        self.emit("self._token_end += 1", 2)
+        self.emit("self._token = None", 2)
+        self.emit("check_end(self)", 2)
+        self.emit("check_start(self)", 2)
+        self.emit("check_atom_block(self)", 2)
+        self.emit()
+
+    def bind(self) -> None:
+        self.emit()
+        self.emit("def bind(parser):")
+        self.emit('"""Replace the methods of a parser processing each character with the generated ones,', 1)
+        self.emit('the methods overridden by the parser\'s class are kept"""', 1)
+        self.emit(
+            'methods = {"_scan": scan, "check_end": check_end, "check_start": check_start, '
+            '"check_atom_block": check_atom_block}',
+            1,
+        )
+        self.emit(
+            "overridden = [name for name in methods if getattr(type(parser), name) is not getattr(Parser, name)]", 1
+        )
+        self.emit("for name, function in methods.items():", 1)
+        self.emit("# the generated scan calls the other generated methods directly, bypassing the overrides", 2)
+        self.emit('if not overridden or name not in overridden and name != "_scan":', 2)
+        self.emit("setattr(parser, name, MethodType(function, parser))", 3)
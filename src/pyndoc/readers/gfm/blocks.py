@@ -1,68 +1,67 @@
 from __future__ import annotations
 import re
+from typing import TYPE_CHECKING
 from typing_extensions import Unpack
 from abc import ABC
+from functools import lru_cache
 
 import pyndoc.ast.basic_blocks as ast_base
 import pyndoc.ast.blocks as ast
 from pyndoc.ast.read_handler import CompositeReadHandler
 import pyndoc.ast.helpers as ast_helpers
 
+if TYPE_CHECKING:
+    from pyndoc.readers.grammar import Grammar
+
 
 class Space(ast.Space):
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__()
 
     @classmethod
-    def match_pattern(cls, **kwargs: Unpack[ast_helpers.AtomMatchParams]) -> tuple[re.Match | None, str]:
-        context = kwargs["context"]
-        text = kwargs["text"]
-        if not context or context[-1].__class__.__name__ in ("BulletList", "OrderedList"):
-            return (None, text)
-
-        match = re.search(cls.pattern, text)
-        if match and len(text) != match.end():
-            return (None, text)
-        return (match, text)
+    def accepts(cls, context: list) -> bool:
+        return bool(context) and context[-1].__class__.__name__ not in ("BulletList", "OrderedList")
 
 
 class SoftBreak(ast.SoftBreak):
+    __slots__ = ()
 
     @classmethod
-    def match_pattern(cls, **kwargs: Unpack[ast_helpers.AtomMatchParams]) -> tuple[re.Match | None, str]:
-        context = kwargs["context"]
-        text = kwargs["text"]
-
-        if not context or context[-1].__class__.__name__ in ("BulletList", "OrderedList"):
-            return (None, text)
-
-        match = re.search(cls.pattern, text)
-        if match and len(text) != match.end():
-            return (None, text)
-
-        if match and not context:
-            return (match, "")
-        return (match, text)
+    def accepts(cls, context: list) -> bool:
+        return bool(context) and context[-1].__class__.__name__ not in ("BulletList", "OrderedList")
 
 
 class Header(ast.Header):
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__()
 
     def process_read(self, **kwargs: Unpack[ast_helpers.ProcessParams]) -> None:
         match = kwargs["match"]
         level = len(match.group("h"))
-        self.contents.metadata = [level]
+        self.metadata = [level]
 
 
 class Emph(ast.Emph):
+    __slots__ = ()
+
     def __init__(self, **_: None) -> None:
         super().__init__()
 
+    @classmethod
+    def end_patterns(cls, pattern: re.Pattern) -> dict[str, re.Pattern]:
+        """Get the end pattern of an Emph, as well as the pattern used inside of a Strong
+        (the first two characters of the pattern)
+        """
+        return {"end": pattern, "strong_end": re.compile(pattern.pattern[:2])}
+
     @classmethod
     def start(cls, **kwargs: Unpack[ast_helpers.StartParams]) -> tuple[re.Match | None, str]:
         token = kwargs["token"]
-        match = re.search(cls.start_pattern, token)
+        match = kwargs["grammar"].start_pattern(cls).search(token)
         token = token[-1:] if match else token
         return (match, token)
 
@@ -70,12 +69,14 @@ class Emph(ast.Emph):
     def end(cls, **kwargs: Unpack[ast_helpers.EndParams]) -> tuple[re.Match | None, str]:
         token = kwargs["token"]
         context = kwargs["context"]
+        grammar = kwargs["grammar"]
+        pos = kwargs.get("pos", 0)
 
         if context[-2] and context[-2].__class__.__name__ == "Strong":
-            match = re.search(cls.end_pattern[:2], token)
+            match = grammar.search_end(cls, token, pos, "strong_end")
             token = token[match.end() :] if match else token
         else:
-            match = re.search(cls.end_pattern[:], token)
+            match = grammar.search_end(cls, token, pos)
             token = token[match.end() - 1 :] if match else token
         return (match, token)
 
@@ -85,12 +86,306 @@ class Emph(ast.Emph):
         return token[:-1] if token[-1] == "*" else token
 
 
+class EmphasisReader:
+    """Reads a paragraph of atom blocks, ``Emph`` and ``Strong`` in a single pass, used by the line parser.
+    The stack of open emphasis blocks is the stack of delimiter runs - a run of ``*`` either closes the block
+    on top of the stack, or opens a new one, the same way ``start`` and ``end`` of the blocks would.
+    Only the characters of delimiter runs (and the first ones after them) are processed one at a time,
+    runs of other characters are appended to the token at once.
+
+    The reader implements the patterns below, instead of matching them for each character.
+    Paragraphs of a grammar declaring the blocks differently are not read (see ``implements``),
+    so they are processed character by character, with the grammar's patterns
+    """
+
+    run_regex = re.compile(r"\*+|[^ \n\*]+|[ ]+|\n")
+
+    #: Start patterns of the emphasis blocks, which the reader implements
+    start_patterns = {ast.Strong: r"\*\*", Emph: r"\*[^*]{1}"}
+    #: End patterns of the emphasis blocks and the paragraph, by block and the pattern's name
+    end_patterns = {
+        (ast.Strong, "end"): r"\*\*",
+        (Emph, "end"): r"\*[^*]{1}",
+        (Emph, "strong_end"): r"\*",
+        (ast.Para, "end"): r"\n\n",
+    }
+    #: Atom patterns, in order of declaration
+    atom_patterns = {Space: r"^[ ]+$", ast.Str: r"^[^\s\n]+$", SoftBreak: r"^\n"}
+
+    def __init__(self) -> None:
+        self.stack = []  #: The paragraph and the open emphasis blocks
+        self.token = ""  #: The text not read into atom blocks yet
+
+    @classmethod
+    def read(cls, paragraph: str, grammar: Grammar) -> ast.Para | None:
+        """Read a paragraph, which is followed by an empty line
+
+        :param paragraph: The paragraph's text, without the empty line
+        :type paragraph: str
+        :param grammar: The grammar of the paragraph's language
+        :type grammar: Grammar
+        :return: The paragraph's block, or None if an emphasis block is not closed within the paragraph
+            (or the reader does not implement the grammar)
+        :rtype: ast.Para | None
+        """
+        if not cls.implements(grammar):
+            return None
+        reader = cls()
+        for match in cls.run_regex.finditer(paragraph + "\n"):
+            reader.read_run(match.group())
+
+        # the empty line would end the paragraph only if no emphasis is left open
+        if len(reader.stack) != 1 or reader.token != "\n":
+            return None
+        return reader.stack[0]
+
+    @classmethod
+    @lru_cache(maxsize=None)
+    def implements(cls, grammar: Grammar) -> bool:
+        """Check if the reader implements a grammar - if the grammar declares the emphasis blocks, the atom blocks
+        and the paragraph with the reader's patterns, and the blocks read them with the handlers the reader follows
+
+        :param grammar: The checked grammar
+        :type grammar: Grammar
+        :rtype: bool
+        """
+        block_types = grammar.block_types
+        return (
+            all(grammar.start_pattern(block).pattern == pattern for block, pattern in cls.start_patterns.items())
+            and all(
+                grammar.end_pattern(block, name).pattern == pattern
+                for (block, name), pattern in cls.end_patterns.items()
+            )
+            and all(grammar.is_inline(block) for block in cls.start_patterns)
+            and ast.Strong in block_types
+            and Emph in block_types
+            and block_types.index(ast.Strong) < block_types.index(Emph)
+            and grammar.atom_wrapper is ast.Para
+            and grammar.atom_block_types == tuple(cls.atom_patterns)
+            and all(grammar.atom_pattern(block).pattern == pattern for block, pattern in cls.atom_patterns.items())
+            and all(grammar.has_content(block) == (block is ast.Str) for block in cls.atom_patterns)
+            and ast.Strong.start.__func__ is CompositeReadHandler.start.__func__
+            and ast.Strong.end.__func__ is CompositeReadHandler.end.__func__
+        )
+
+    def read_run(self, run: str) -> None:
+        """Read a run of characters of a single class (a delimiter run, spaces, a word or a newline)"""
+        if run[0] == "*":
+            for char in run:
+                self.read_char(char)
+            return
+
+        self.read_char(run[0])
+        if len(run) > 1 and "*" not in self.token and self._atom(self.token) is self._atom(run):
+            self.token += run[1:]
+            return
+        for char in run[1:]:
+            self.read_char(char)
+
+    def read_char(self, char: str) -> None:
+        """Read a single character - check if the block on top of the stack has ended, if a new one has started,
+        then if an atom block has ended
+        """
+        token = self.token + char
+        top = self.stack[-1] if self.stack else None
+
+        if isinstance(top, ast.Strong) and token.endswith("**"):
+            self._insert(token[:-2])
+            token = ""
+            self._end()
+        elif isinstance(top, Emph) and isinstance(self.stack[-2], ast.Strong) and char == "*":
+            self._insert(token[:-1])
+            token = ""
+            self._end()
+        elif isinstance(top, Emph) and char != "*" and token[:-1].endswith("*"):
+            self._insert(token[:-2])
+            token = char
+            self._end()
+
+        if (index := token.find("**")) != -1:
+            self._open(ast.Strong(), token[:index])
+            token = token[:index]
+        elif (index := self._emph_start(token)) != -1:
+            self._open(Emph(), token[:index])
+            token = token[-1:]
+
+        # an atom block has ended, if the token without its last character matched a different one
+        atom = self._atom(token[:-1])
+        if atom and atom is not self._atom(token):
+            self._insert(token[:-1])
+            token = token[-1:]
+        self.token = token
+
+    @staticmethod
+    def _emph_start(token: str) -> int:
+        """Find a ``*`` followed by another character"""
+        index = token.find("*")
+        while index != -1 and index + 1 < len(token):
+            if token[index + 1] != "*":
+                return index
+            index = token.find("*", index + 1)
+        return -1
+
+    @staticmethod
+    def _atom(text: str) -> type | None:
+        """Get the type of the atom block matching a text, None if no atom block matches it"""
+        if not text:
+            return None
+        if not text.strip(" "):
+            return Space
+        if " " not in text and "\n" not in text:
+            return ast.Str
+        return SoftBreak if text == "\n" else None
+
+    def _insert(self, text: str) -> None:
+        """Insert the atom block matching a text into the block on top of the stack, starting the paragraph"""
+        atom = self._atom(text)
+        if atom is None:
+            return
+        if not self.stack:
+            self.stack.append(ast.Para())
+        self.stack[-1].insert(atom(text) if atom is ast.Str else atom.shared())
+
+    def _open(self, block: ast_base.ASTCompositeBlock, text: str) -> None:
+        """Push an emphasis block onto the stack, inserting the text before its delimiter run first.
+        The first block of a paragraph starts the paragraph instead (and the text is not inserted)
+        """
+        if not self.stack:
+            self.stack.append(ast.Para())
+        else:
+            self._insert(text)
+        self.stack.append(block)
+
+    def _end(self) -> None:
+        """Pop the block on top of the stack into the block below it"""
+        block = self.stack.pop()
+        self.stack[-1].insert(block)
+
+
+class LinkReader:
+    """Finds links (``[text](destination)``) and images (``![description](source)``) in a finished block.
+    Brackets are matched in the ``Str`` blocks of each composite block separately, with a stack of openers:
+    every ``]`` takes at most one opener off the stack, and the destination after it is only looked for
+    a bounded number of characters ahead, so a block full of unmatched brackets is still read in linear time.
+    As in CommonMark, links can not contain other links - openers below a link become inactive.
+    Text of brackets, which do not form a link, is left as it was read
+    """
+
+    bracket_regex = re.compile(r"!?\[|\]")
+    # the destination (without spaces or parentheses) is looked for at most 1024 characters ahead
+    destination_regex = re.compile(r"\((?P<url>[^\s()]{0,1024})\)")
+
+    @classmethod
+    def resolve(cls, block: ast_base.ASTBlock) -> None:
+        """Replace the brackets forming links and images in a block (and the blocks within it) in place
+
+        :param block: A finished top-level block
+        :type block: ASTBlock
+        """
+        stack = [block]
+        while stack:
+            block = stack.pop()
+            if not isinstance(block, ast_base.ASTCompositeBlock):
+                continue
+            contents = block.blocks
+            stack.extend(contents)
+            links = cls.match_brackets(contents)
+            if links:
+                block.blocks = cls.build(contents, links)
+
+    @classmethod
+    def match_brackets(cls, contents: list) -> list[tuple]:
+        """Match the brackets in the ``Str`` blocks of a list of blocks
+
+        :param contents: The contents of a composite block
+        :type contents: list
+        :return: The links found, as ``(opener, closer, url)``, where the opener is ``(index, start, end, is_image)``
+            and the closer is ``(index, start, end)`` - the index of the block, and the span of the brackets in its text
+        :rtype: list[tuple]
+        """
+        links = []
+        openers = []
+        inactive = 0  # the amount of openers at the bottom of the stack, which can not form links
+        for index, atom in enumerate(contents):
+            if atom.__class__ is not ast.Str or ("[" not in atom.contents and "]" not in atom.contents):
+                continue
+            text = atom.contents
+            pos = 0
+            while bracket := cls.bracket_regex.search(text, pos):
+                pos = bracket.end()
+                if bracket.group() != "]":
+                    openers.append((index, bracket.start(), pos, bracket.group() == "!["))
+                    continue
+                if not openers:
+                    continue
+
+                opener = openers.pop()
+                is_link = not opener[3]
+                active = not is_link or len(openers) >= inactive
+                inactive = min(inactive, len(openers))
+                if not active or not (destination := cls.destination_regex.match(text, pos)):
+                    continue
+
+                links.append((opener, (index, bracket.start(), destination.end()), destination.group("url")))
+                pos = destination.end()
+                if is_link:
+                    inactive = len(openers)
+        return links
+
+    @classmethod
+    def build(cls, contents: list, links: list[tuple]) -> list:
+        """Split the ``Str`` blocks at the matched brackets, and move the blocks between them into links
+
+        :param contents: The contents of a composite block
+        :type contents: list
+        :param links: The links found by ``match_brackets``
+        :type links: list[tuple]
+        :return: The new contents of the block
+        :rtype: list
+        """
+        # (start, end, block, url) of the brackets in each Str, the block is None for closers
+        brackets = {}
+        for (index, start, end, is_image), closer, url in links:
+            brackets.setdefault(index, []).append((start, end, ast.Image if is_image else ast.Link, url))
+            brackets.setdefault(closer[0], []).append((closer[1], closer[2], None, None))
+
+        result = []
+        marks = []  # the open links, with the indices in the result at which they start
+        for index, atom in enumerate(contents):
+            if index not in brackets:
+                result.append(atom)
+                continue
+
+            pos = 0
+            for start, end, block_type, url in sorted(brackets[index], key=lambda bracket: bracket[0]):
+                if start > pos:
+                    result.append(ast.Str(atom.contents[pos:start]))
+                pos = end
+                if block_type:
+                    marks.append((len(result), block_type, url))
+                    continue
+                mark, block_type, url = marks.pop()
+                block = block_type()
+                block.metadata = [url]
+                block.blocks = result[mark:]
+                del result[mark:]
+                result.append(block)
+            if pos < len(atom.contents):
+                result.append(ast.Str(atom.contents[pos:]))
+        return result
+
+
 class _GFMList(ABC, CompositeReadHandler):
     """
     Base class for gfm lists e.g. bullet list or ordered list
     Class made to avoid code repetition, it should not be used on its own
     """
 
+    __slots__ = ()
+
+    # an indentation (without newlines) and a list marker, followed by a space
+    item_regex = re.compile(r"[ \t]*(?:[\*\+\-]|\d{1,9}[\.\)]) ")
+
     @staticmethod
     def add_plain(context: list) -> None:
         plain = ast.Plain()
@@ -100,13 +395,13 @@ class _GFMList(ABC, CompositeReadHandler):
     def start(cls, **kwargs: Unpack[ast_helpers.StartParams]) -> tuple[re.Match | None, str]:
         token = kwargs["token"]
         context = kwargs["context"]
-        match = re.search(cls.start_pattern, token)
+        match = kwargs["grammar"].start_pattern(cls).search(token)
 
         if match:
             bigger_indent = False
             if context and issubclass(context[-1].__class__, _GFMList):
                 match_indent = len(match.group("s"))
-                context_indent = context[-1].contents.metadata[0]
+                context_indent = context[-1].metadata[0]
                 bigger_indent = match_indent > context_indent
                 if match_indent == context_indent:
                     cls.add_plain(context)
@@ -127,31 +422,77 @@ class _GFMList(ABC, CompositeReadHandler):
         """
         token = kwargs["token"]
         context = kwargs["context"]
+        grammar = kwargs["grammar"]
 
-        if len(context) >= 2 and (match := re.search(context[-2].__class__.start_pattern, token)) is not None:
+        if len(context) >= 2 and (match := grammar.start_pattern(context[-2].__class__).search(token)) is not None:
             token_indent = len(match.group("s"))
-            block_indent = context[-1].contents.metadata[0]
+            block_indent = context[-1].metadata[0]
             if token_indent < block_indent:
                 return (match, token)
             return (None, "")
 
-        match = re.search(cls.end_pattern, token)
+        match = grammar.search_end(cls, token, kwargs.get("pos", 0))
         token = token[match.end() :] if match else token
         return (match, token)
 
+    @classmethod
+    def scan_contents(cls, **kwargs: Unpack[ast_helpers.ScanParams]) -> int:
+        """Read the indentation and the marker of a list item at once, and decide if the item
+        continues the list, closes it, starts a nested list or a next item (as ``end`` and ``start`` would,
+        when the space after the marker is read). The context stack of lists is the indentation stack.
+        Items, which would need more characters to be decided, are read one character at a time
+        """
+        context = kwargs["context"]
+        grammar = kwargs["grammar"]
+        item = cls.item_regex.match(kwargs["buffer"], kwargs["pos"], kwargs["endpos"])
+        if not item:
+            return kwargs["pos"]
+        token = item.group()
+
+        closes = False
+        if len(context) >= 2:
+            if not isinstance(context[-2], _GFMList):
+                return kwargs["pos"]
+            if match := grammar.start_pattern(context[-2].__class__).search(token):
+                if len(match.group("s")) >= context[-1].metadata[0]:
+                    return item.end()
+                closes = True
+
+        for list_type in (BulletList, OrderedList):
+            if match := grammar.start_pattern(list_type).search(token):
+                break
+        indent = len(match.group("s"))
+        block_indent = context[-2 if closes else -1].metadata[0]
+        if indent < block_indent:
+            return kwargs["pos"]
+
+        if closes:
+            item_block = context.pop()
+            context[-1].insert(item_block)
+        if indent > block_indent:
+            context.append(list_type())
+            context[-1].process_read(match=match, context=context)
+        else:
+            cls.add_plain(context)
+        return item.end()
+
 
 class BulletList(_GFMList, ast.BulletList):
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__()
 
     def process_read(self, **kwargs: Unpack[ast_helpers.ProcessParams]) -> None:
         match = kwargs["match"]
         indent = len(match.group("s"))
-        self.contents.metadata = [indent]
+        self.metadata = [indent]
         self.add_plain(kwargs["context"])
 
 
 class OrderedList(_GFMList, ast.OrderedList):
+    __slots__ = ()
+
     separator_dict = {".": ast_helpers.Separator.PERIOD, ")": ast_helpers.Separator.CLOSING_PAREN}
     numbering_type = ast_helpers.NumberingType.DECIMAL  # gfm supports only decimal numbering type
 
@@ -165,11 +506,13 @@ class OrderedList(_GFMList, ast.OrderedList):
         starting_num = int(match.group("num"))
         separator = self.separator_dict[match.group("sep")]
 
-        self.contents.metadata = [indent, starting_num, OrderedList.numbering_type, separator]
+        self.metadata = [indent, starting_num, OrderedList.numbering_type, separator]
         self.add_plain(kwargs["context"])
 
 
 class Table(ast.Table):
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__()
 
@@ -196,13 +539,13 @@ class Table(ast.Table):
     @classmethod
     def handle_table_end(cls, context: list) -> None:
         table = context[-1]
-        thead = table.contents.contents[0]
-        alignment = table.contents.metadata[0]
+        thead = table.blocks[0]
+        alignment = table.metadata[0]
         row_size = len(alignment)
 
         TableHead.format_table_head(thead, alignment, row_size)
-        if len(table.contents.contents) > 1:
-            tbody = table.contents.contents[1]
+        if len(table.blocks) > 1:
+            tbody = table.blocks[1]
             TableBody.format_table_body(tbody, alignment, row_size)
 
         context[-1] = table
@@ -211,15 +554,15 @@ class Table(ast.Table):
     def handle_table_head_end(cls, context: list) -> None:
         table = context[-2]
         thead = context[-1]
-        delimiter_row = thead.contents.contents.pop()
-        row_contents = delimiter_row.contents.contents
+        delimiter_row = thead.blocks.pop()
+        row_contents = delimiter_row.blocks
 
         if not Row.is_delimiter_row(delimiter_row):
             raise NotImplementedError
 
         alignment = ast_helpers.AlignmentList([Cell.get_delimiter_cell_alignment(cell) for cell in row_contents])
 
-        table.contents.metadata = [alignment]
+        table.metadata = [alignment]
 
     def process_read(self, **kwargs: Unpack[ast_helpers.ProcessParams]) -> None:
         context = kwargs.get("context")
@@ -243,7 +586,7 @@ class Table(ast.Table):
         if context and context[-1].__class__.__name__ in ("Table", "TableHead", "TableBody", "Row", "Cell"):
             return (None, token)
 
-        match = re.search(cls.start_pattern, token)
+        match = kwargs["grammar"].start_pattern(cls).search(token)
         token = token[match.end() :] if match else token
 
         return (match, token)
@@ -251,7 +594,7 @@ class Table(ast.Table):
     @classmethod
     def end(cls, **kwargs: Unpack[ast_helpers.EndParams]) -> tuple[re.Match | None, str]:
         token = kwargs["token"]
-        match = re.search(cls.end_pattern, token)
+        match = kwargs["grammar"].search_end(cls, token, kwargs.get("pos", 0))
 
         if match:
             cls.handle_table_end(kwargs["context"])
@@ -260,26 +603,28 @@ class Table(ast.Table):
 
 
 class TableHead(ast.TableHead):
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__()
 
     @staticmethod
     def format_table_head(thead: TableHead, alignment: list[ast_helpers.Alignment], row_size: int) -> None:
-        if not len(thead.contents.contents):
+        if not len(thead.blocks):
             raise ValueError("Invalid table head")
-        elif not isinstance(thead.contents.contents[0], Row):
+        elif not isinstance(thead.blocks[0], Row):
             raise ValueError("TableHead should contain only rows")
 
-        Row.format_row(thead.contents.contents[0], alignment, row_size)
+        Row.format_row(thead.blocks[0], alignment, row_size)
 
     @classmethod
     def end(cls, **kwargs: Unpack[ast_helpers.EndParams]) -> tuple[re.Match | None, str]:
         context = kwargs.get("context")
         token = kwargs.get("token")
-        if len(context[-1].contents.contents) != 2:
+        if len(context[-1].blocks) != 2:
             return (None, token)
 
-        match = re.search(cls.end_pattern, token)
+        match = kwargs["grammar"].search_end(cls, token, kwargs.get("pos", 0))
         if match:
             context[-2].handle_table_head_end(context)
 
@@ -289,12 +634,17 @@ class TableHead(ast.TableHead):
 
 
 class TableBody(ast.TableBody):
+    __slots__ = ()
+
+    # rows of cells containing only words and spaces, in which no other block can start
+    simple_row_regex = re.compile(r"\|(?:(?:[^\s|*`#]|[ ])+\|)+\n")
+
     def __init__(self) -> None:
         super().__init__()
 
     @staticmethod
     def format_table_body(tbody: TableBody, alignment: list[ast_helpers.Alignment], row_size: int) -> None:
-        for row in tbody.contents.contents:
+        for row in tbody.blocks:
             if not isinstance(row, Row):
                 raise ValueError("TableBody should contain only rows in contents")
             row = Row.format_row(row, alignment, row_size)
@@ -303,26 +653,55 @@ class TableBody(ast.TableBody):
     def end(cls, **kwargs: Unpack[ast_helpers.EndParams]) -> tuple[re.Match | None, str]:
         token = kwargs.get("token")
 
-        match = re.search(cls.end_pattern, token)
+        match = kwargs["grammar"].search_end(cls, token, kwargs.get("pos", 0))
         token = token[match.end() :] if match else token
 
         return (match, token)
 
+    @classmethod
+    def scan_contents(cls, **kwargs: Unpack[ast_helpers.ScanParams]) -> int:
+        """Read whole lines of simple rows at once, splitting them into cells with a single scan.
+        Other rows are read one character at a time
+        """
+        buffer, pos, endpos = kwargs["buffer"], kwargs["pos"], kwargs["endpos"]
+        tbody = kwargs["context"][-1]
+
+        while match := cls.simple_row_regex.match(buffer, pos, endpos):
+            tbody.insert(Row.read_row(match.group()[1:-2].split("|")))
+            pos = match.end()
+        return pos
+
 
 class Row(ast.Row):
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__()
 
     @staticmethod
     def format_row(row: Row, alignment: list[ast_helpers.Alignment], size: int) -> None:
-        while len(row.contents.contents) < size:
-            row.contents.contents.append(Cell())
-        row.contents.contents = row.contents.contents[:size]
+        while len(row.blocks) < size:
+            row.blocks.append(Cell())
+        row.blocks = row.blocks[:size]
 
-        for cell, align in zip(row.contents.contents, alignment):
+        for cell, align in zip(row.blocks, alignment):
             if not isinstance(cell, Cell):
                 raise ValueError("Row should contain only cells")
-            cell.contents.metadata.append(align)
+            cell.metadata.append(align)
+
+    @staticmethod
+    def read_row(cells: list[str]) -> Row:
+        """Build a row from the texts of its cells, as if it was read one character at a time
+
+        :param cells: The texts of the row's cells
+        :type cells: list[str]
+        :return: The row
+        :rtype: Row
+        """
+        row = Row()
+        for text in cells:
+            row.insert(Cell.read_cell(text))
+        return row
 
     @staticmethod
     def is_delimiter_row(row: Row) -> bool:
@@ -333,7 +712,7 @@ class Row(ast.Row):
         return: true if row is delimiter row, otherwise false
         :rtype: bool
         """
-        for cell in row.contents.contents:
+        for cell in row.blocks:
             if not isinstance(cell, Cell) or not Cell.is_delimiter_cell(cell):
                 return False
         return True
@@ -342,14 +721,17 @@ class Row(ast.Row):
     def end(cls, **kwargs: Unpack[ast_helpers.EndParams]) -> tuple[re.Match | None, str]:
         token = kwargs.get("token")
 
-        match = re.search(cls.end_pattern, token)
+        match = kwargs["grammar"].search_end(cls, token, kwargs.get("pos", 0))
         token = token[match.end() :] if match else token
 
         return (match, token)
 
 
 class Cell(ast.Cell):
-    delimiter_regex = r"(?P<l>:?)-+(?P<r>:?)"
+    __slots__ = ()
+
+    delimiter_regex = re.compile(r"(?P<l>:?)-+(?P<r>:?)")
+    run_regex = re.compile(r"[ ]+|[^ ]+")
 
     def __init__(self) -> None:
         super().__init__()
@@ -365,10 +747,10 @@ class Cell(ast.Cell):
         :return: true if passed cell is delimiter cell, otherwise false
         :rtype: bool
         """
-        contents = cell.contents.contents
+        contents = cell.blocks
 
         if len(contents) == 1 and isinstance(contents[0], ast.Str):
-            return re.match(cls.delimiter_regex, contents[0].contents) is not None
+            return cls.delimiter_regex.match(contents[0].contents) is not None
 
         return False
 
@@ -385,10 +767,10 @@ class Cell(ast.Cell):
         def _is_not_empty(span: tuple[int, int]) -> bool:
             return span[0] != span[1]
 
-        if not cls.is_delimiter_cell(cell) or not isinstance(cell.contents.contents[0], ast.Str):
+        if not cls.is_delimiter_cell(cell) or not isinstance(cell.blocks[0], ast.Str):
             raise ValueError("The cell provided as delimiter cell is not a delimiter cell")
 
-        match = re.match(cls.delimiter_regex, cell.contents.contents[0].contents)
+        match = cls.delimiter_regex.match(cell.blocks[0].contents)
 
         if not match:
             raise ValueError("The cell provided didnt match delimiter cell regex")
@@ -401,14 +783,36 @@ class Cell(ast.Cell):
         }
         return alignment_map[(_is_not_empty(match.span("l")), _is_not_empty(match.span("r")))]
 
+    @classmethod
+    def read_cell(cls, text: str) -> Cell:
+        """Build a cell from its text (containing only words and spaces), as if it was read one character at a time.
+        Spaces before the closing ``|`` are a part of the end of the cell, and a leading space is deleted
+        only once the cell has more contents when it is checked for its end
+
+        :param text: The text between the cell's delimiters
+        :type text: str
+        :return: The cell
+        :rtype: Cell
+        """
+        runs = cls.run_regex.findall(text)
+        if len(runs) > 2 and runs[0][0] == " ":
+            runs = runs[1:]
+        if runs[-1][0] == " ":
+            runs = runs[:-1]
+
+        cell = cls()
+        for run in runs:
+            cell.insert(Space.shared() if run[0] == " " else ast.Str(run))
+        return cell
+
     @classmethod
     def _delete_trailing_spaces(cls, context: list) -> None:
-        contents = context[-1].contents.contents
+        contents = context[-1].blocks
         if not isinstance(context[-1], cls) or len(contents) == 1:
             return
 
         contents = contents[1:] if len(contents) > 1 and isinstance(contents[0], ast.Space) else contents
-        context[-1].contents.contents = contents
+        context[-1].blocks = contents
 
     @classmethod
     def start(cls, **kwargs: Unpack[ast_helpers.StartParams]) -> tuple[re.Match | None, str]:
@@ -417,7 +821,7 @@ class Cell(ast.Cell):
         token = kwargs["token"]
         context = kwargs["context"]
 
-        match = re.search(cls.start_pattern, token)
+        match = kwargs["grammar"].start_pattern(cls).search(token)
         if not context or not match or context[-1].__class__.__name__ not in ("Table", "TableHead", "TableBody", "Row"):
             return (None, token)
 
@@ -435,19 +839,45 @@ class Cell(ast.Cell):
         token = kwargs["token"]
         context = kwargs["context"]
 
-        match = re.search(cls.end_pattern, token)
+        match = kwargs["grammar"].search_end(cls, token, kwargs.get("pos", 0))
         token = token[match.end() - 1 :] if match else token
         cls._delete_trailing_spaces(context)
 
         return (match, token)
 
 
+def _scan_code(code: ast_base.ASTAtomBlock, fence: re.Pattern, width: int, buffer: str, pos: int, endpos: int) -> int:
+    """Add the text of a buffer up to the first possible closing fence to the contents of a code block at once.
+    The fence itself is left to be found by the block's ``end``, one character at a time
+
+    :param code: The ``Code`` or ``CodeBlock`` being read
+    :type code: ASTAtomBlock
+    :param fence: The pattern of the closing fence
+    :type fence: re.Pattern
+    :param width: The maximum length of the fence (0 if unknown)
+    :type width: int
+    :return: The offset in the buffer, up to which the text was added
+    :rtype: int
+    """
+    # a fence may begin with the end of the contents, and end in the buffer
+    tail = code.ending(width - 1) if width > 1 else ""
+    if not width or fence.search(tail + buffer[pos : pos + width - 1]):
+        return pos
+
+    match = fence.search(buffer, pos, endpos)
+    end = match.start() if match else endpos
+    code.append_span(buffer, pos, end)
+    return end
+
+
 class CodeBlockHelper(ast_base.ASTCompositeBlock):
     """A composite helper for parsing ``CodeBlocks``
     This block will create a ``CodeBlock`` in its contents, parse its metadata and adjust contents.
     When the block ends, it will replace itself with the ``CodeBlock`` in the context stack.
     """
 
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__("CodeBlockHelper (Dev)")
 
@@ -455,9 +885,9 @@ class CodeBlockHelper(ast_base.ASTCompositeBlock):
         """Parse a ``CodeBlock`` metadata and add an empty ``CodeBlock`` to the block's contents"""
 
         match = kwargs["match"]
-        self.contents.contents.append(ast.CodeBlock())
-        if isinstance(self.contents.contents[0], ast.CodeBlock):
-            self.contents.contents[0].metadata.append(match.group("lang"))
+        self.blocks.append(ast.CodeBlock())
+        if isinstance(self.blocks[0], ast.CodeBlock):
+            self.blocks[0].metadata.append(match.group("lang"))
 
     @classmethod
     def end(cls, **kwargs: Unpack[ast_helpers.EndParams]) -> tuple[re.Match | None, str]:
@@ -467,19 +897,27 @@ class CodeBlockHelper(ast_base.ASTCompositeBlock):
 
         token = kwargs["token"]
         context = kwargs["context"]
-        code_block = context[-1].contents.contents[0]
+        code_block = context[-1].blocks[0]
 
-        code_block.contents += token
+        code_block.append_span(token, 0, len(token))
         token = ""
 
-        search_string = code_block.contents[-4:]
-        match = re.search(cls.end_pattern, search_string)
+        search_string = code_block.ending(4)
+        match = kwargs["grammar"].end_pattern(cls).search(search_string)
         if not match:
             return (match, token)
         code_block.contents = code_block.contents[:-4]
         context[-1] = code_block
         return match, token
 
+    @classmethod
+    def scan_contents(cls, **kwargs: Unpack[ast_helpers.ScanParams]) -> int:
+        """Add the contents up to a possible end of the block to the ``CodeBlock`` at once"""
+        grammar = kwargs["grammar"]
+        code_block = kwargs["context"][-1].blocks[0]
+        fence, width = grammar.end_pattern(cls), grammar.end_window(cls) or 0
+        return _scan_code(code_block, fence, width, kwargs["buffer"], kwargs["pos"], kwargs["endpos"])
+
 
 class CodeHelper(ast_base.ASTCompositeBlock):
     """A Helper for parsing inline code
@@ -487,25 +925,27 @@ class CodeHelper(ast_base.ASTCompositeBlock):
     When the block ends, it will replace itself with the ``Code`` in the context stack.
     """
 
+    __slots__ = ("fence",)
+
     def __init__(self) -> None:
         super().__init__("CodeHelper (Dev)")
 
     def process_read(self, **kwargs: Unpack[ast_helpers.ProcessParams]) -> None:
-        """Set the end pattern of the block based on the start pattern.
+        """Set the end pattern of the block (its fence) based on the start pattern.
         Then add an empty ``Code`` block to the contents
         """
 
         match = kwargs["match"]
         if match:
-            self.override_end(match.group()[:-1])
+            self.fence = re.compile(match.group()[:-1])
         code = ast.Code()
         code.contents += match.group()[-1]
-        self.contents.contents.append(code)
+        self.blocks.append(code)
 
     @classmethod
     def start(cls, **kwargs: Unpack[ast_helpers.StartParams]) -> tuple[re.Match | None, str]:
         token = kwargs["token"]
-        match = re.search(cls.start_pattern, token)
+        match = kwargs["grammar"].start_pattern(cls).search(token)
         token = '' if match else token
         return match, token
     
@@ -516,16 +956,25 @@ class CodeHelper(ast_base.ASTCompositeBlock):
         """
         token = kwargs["token"]
         context = kwargs["context"]
-        code = context[-1].contents.contents[0]
+        fence = context[-1].fence
+        code = context[-1].blocks[0]
 
-        code.contents += token
+        code.append_span(token, 0, len(token))
         token = ""
 
-        end_len = len(cls.end_pattern)
-        search_string = code.contents[-end_len:]
-        match = re.search(cls.end_pattern, search_string)
+        end_len = len(fence.pattern)
+        search_string = code.ending(end_len)
+        match = fence.search(search_string)
         if not match:
             return (match, token)
         code.contents = code.contents[:-end_len]
         context[-1] = code
         return match, token
+
+    @classmethod
+    def scan_contents(cls, **kwargs: Unpack[ast_helpers.ScanParams]) -> int:
+        """Add the contents up to a possible fence to the ``Code`` at once"""
+        helper = kwargs["context"][-1]
+        code = helper.blocks[0]
+        width = len(helper.fence.pattern)
+        return _scan_code(code, helper.fence, width, kwargs["buffer"], kwargs["pos"], kwargs["endpos"])
@@ -53,22 +53,20 @@ atoms_content = {
     ast.CodeBlock: True,
 }
 
+# which paragraphs contain only atom blocks? (optional, used by the line parser)
+# matches the longest prefix of a paragraph in which no composite block can start
+prose_pattern = r"(?![\*\+\-] |\d{1,9}[\.)] )(?=\S)(?:[^\s\*`\|#]|[ ]|\n(?!\n))+"
 
-def assign_patterns() -> None:
-    start_dict = declared_tokens
-    end_dict = declared_ends
-    atomic_patterns_dict = declared_atomic_patterns
+# how are these paragraphs split into atom blocks?
+prose_atom_pattern = r"[^ \n]+|[ ]+|\n"
 
-    for block in end_dict.keys():
-        block.override_end(end_dict[block])
+# which paragraphs contain only atom blocks and emphasis? (optional, used by the line parser)
+emphasis_pattern = r"(?![\*\+\-] |\d{1,9}[\.)] )(?=\S)(?:[^\s`\|#]|[ ]|\n(?!\n))+"
 
-    for block in start_dict.keys():
-        block.override_start(start_dict[block][0])
-        if start_dict[block][1]:
-            block.override_inline(True)
+# how are these paragraphs read? (a class with a read(paragraph, grammar) method, returning the paragraph's block
+# or None), gfm.EmphasisReader implements the patterns of Strong, Emph and the atom blocks declared above
+emphasis_reader = gfm.EmphasisReader
 
-    for block in atomic_patterns_dict.keys():
-        block.override_match_pattern(atomic_patterns_dict[block])
 
-    for block in atomic_patterns_dict.keys():
-        block.override_has_content(atoms_content[block])
+# how are links and images found? (optional, a class with a resolve(block) method, called for each finished block)
+link_reader = gfm.LinkReader
@@ -0,0 +1,388 @@
+import re
+import importlib
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Callable
+
+try:
+    import re._parser as sre_parse
+    import re._constants as sre
+except ImportError:  # the internals of re are private, patterns are not analysed without them
+    sre_parse = sre = None
+
+EMPTY_PATTERN = re.compile("")  #: The pattern of blocks without a declared pattern
+
+if sre is not None:
+    # predicates for character categories, they may accept more characters than the pattern does
+    _CATEGORIES = {
+        sre.CATEGORY_DIGIT: str.isdecimal,
+        sre.CATEGORY_SPACE: str.isspace,
+        sre.CATEGORY_WORD: lambda char: char.isalnum() or char == "_",
+    }
+
+    _ZERO_WIDTH = (sre.AT, sre.ASSERT, sre.ASSERT_NOT)
+    _REPEATS = (sre.MAX_REPEAT, sre.MIN_REPEAT, sre.POSSESSIVE_REPEAT)
+    # items whose result depends on characters outside of the matched text (or on other groups)
+    _CONTEXT_DEPENDENT = (sre.AT, sre.ASSERT, sre.ASSERT_NOT, sre.GROUPREF, sre.GROUPREF_EXISTS)
+
+
+class _UnknownCharsError(Exception):
+    """Raised when a part of a pattern can not be analysed"""
+
+
+class FirstChars:
+    """Characters with which a match of a pattern can start.
+    The set may be larger than the actual one, but never smaller
+
+    :param literals: Single characters
+    :type literals: ``frozenset[str]``
+    :param categories: Predicates for categories of characters (e.g. digits)
+    :type categories: ``tuple[Callable[[str], bool], ...]``
+    """
+
+    def __init__(self, literals: frozenset[str], categories: tuple[Callable[[str], bool], ...] = ()) -> None:
+        self.literals = literals
+        self.categories = categories
+
+    def __contains__(self, char: str) -> bool:
+        return char in self.literals or any(category(char) for category in self.categories)
+
+    def __or__(self, other: "FirstChars") -> "FirstChars":
+        return FirstChars(self.literals | other.literals, self.categories + other.categories)
+
+
+def is_anchored(pattern: re.Pattern) -> bool:
+    """Check if a pattern can only match at the beginning of a string
+
+    :param pattern: The checked pattern
+    :type pattern: ``re.Pattern``
+    """
+    if sre_parse is None or pattern.flags & re.MULTILINE:
+        return False
+    try:
+        items = _parse(pattern)
+    except re.error:
+        return False
+    return len(items) > 0 and items[0] in ((sre.AT, sre.AT_BEGINNING), (sre.AT, sre.AT_BEGINNING_STRING))
+
+
+def first_chars(pattern: re.Pattern) -> FirstChars | None:
+    """Find the characters with which a match of a pattern can start
+
+    :param pattern: The analysed pattern
+    :type pattern: ``re.Pattern``
+    :return: The characters, or None if they could not be determined
+        (or the pattern can match an empty string)
+    :rtype: ``FirstChars | None``
+    """
+    if sre_parse is None or pattern.flags & re.IGNORECASE:
+        return None
+    try:
+        chars, nullable = _first_chars(_parse(pattern))
+    except (re.error, _UnknownCharsError):
+        return None
+    return None if nullable else chars
+
+
+def is_run(pattern: re.Pattern) -> bool:
+    """Check if a pattern matches whole texts, which are runs of characters of a single class,
+    e.g. ``^[ ]+$``. Such a text matches if it is not empty and each of its characters matches
+
+    :param pattern: The analysed pattern
+    :type pattern: ``re.Pattern``
+    """
+    if sre_parse is None or pattern.flags & re.MULTILINE:
+        return False
+    try:
+        items = _parse(pattern)
+    except re.error:
+        return False
+    if len(items) != 3 or items[0] not in ((sre.AT, sre.AT_BEGINNING), (sre.AT, sre.AT_BEGINNING_STRING)):
+        return False
+    if items[2] not in ((sre.AT, sre.AT_END), (sre.AT, sre.AT_END_STRING)):
+        return False
+
+    op, av = items[1]
+    if op not in _REPEATS:
+        return False
+    min_repeat, max_repeat, repeated = av
+    return (
+        min_repeat == 1
+        and max_repeat == sre.MAXREPEAT
+        and len(repeated) == 1
+        and repeated[0][0] in (sre.LITERAL, sre.NOT_LITERAL, sre.IN, sre.ANY)
+    )
+
+
+def match_width(pattern: re.Pattern) -> int | None:
+    """Find the maximum length of a match of a pattern, if it can be used to search only
+    the end of a string. That is, if the pattern can not match an empty string
+    and no part of it looks outside of the matched text (anchors, lookarounds, backreferences)
+
+    :param pattern: The analysed pattern
+    :type pattern: ``re.Pattern``
+    :return: The maximum length of a match, or None if it is unbounded or the pattern can not be searched this way
+    :rtype: ``int | None``
+    """
+    if sre_parse is None:
+        return None
+    try:
+        items = _parse(pattern)
+    except re.error:
+        return None
+    if any(op in _CONTEXT_DEPENDENT for op in _ops(items)):
+        return None
+    min_width, max_width = items.getwidth()
+    if min_width == 0 or max_width >= sre.MAXREPEAT - 1:
+        return None
+    return max_width
+
+
+def max_text_length(pattern: re.Pattern) -> int | None:
+    """Find the maximum length of a text, which a pattern anchored at its beginning can match whole
+
+    :param pattern: The analysed pattern
+    :type pattern: ``re.Pattern``
+    :return: The maximum length, or None if it is unbounded or the pattern is not anchored
+    :rtype: ``int | None``
+    """
+    if not is_anchored(pattern):
+        return None
+    max_width = _parse(pattern).getwidth()[1]
+    return max_width if max_width < sre.MAXREPEAT - 1 else None
+
+
+@lru_cache(maxsize=256)
+def _parse(pattern: re.Pattern) -> "sre_parse.SubPattern":
+    """Parse a pattern into its items, the result is cached and must not be modified"""
+    return sre_parse.parse(pattern.pattern, pattern.flags)
+
+
+def _ops(items: "sre_parse.SubPattern | list") -> list[int]:
+    """Get the opcodes of all items of a pattern, including nested ones"""
+    ops = []
+    for op, av in items:
+        ops.append(op)
+        nested = [av] if isinstance(av, (tuple, list)) else []
+        while nested:
+            value = nested.pop()
+            if isinstance(value, sre_parse.SubPattern):
+                ops += _ops(value)
+            elif isinstance(value, (tuple, list)):
+                nested += value
+    return ops
+
+
+def _first_chars(items: "sre_parse.SubPattern | list") -> tuple[FirstChars, bool]:
+    """Get the first characters of a sequence of pattern items,
+    and whether the sequence can match an empty string
+    """
+    chars = FirstChars(frozenset())
+    for op, av in items:
+        item_chars, nullable = _first_chars_of_item(op, av)
+        chars |= item_chars
+        if not nullable:
+            return chars, False
+    return chars, True
+
+
+def _first_chars_of_item(op: int, av: object) -> tuple[FirstChars, bool]:
+    """Get the first characters of a single pattern item,
+    and whether the item can match an empty string
+    """
+    if op in _ZERO_WIDTH:
+        # assertions only narrow down matches, they can be skipped
+        return FirstChars(frozenset()), True
+    if op == sre.LITERAL:
+        return FirstChars(frozenset(chr(av))), False
+    if op == sre.IN:
+        return _first_chars_of_set(av), False
+    if op == sre.SUBPATTERN:
+        _, add_flags, _, items = av
+        if add_flags & re.IGNORECASE:
+            raise _UnknownCharsError
+        return _first_chars(items)
+    if op == sre.ATOMIC_GROUP:
+        return _first_chars(av)
+    if op in _REPEATS:
+        min_repeat, _, items = av
+        chars, nullable = _first_chars(items)
+        return chars, nullable or min_repeat == 0
+    if op == sre.BRANCH:
+        chars, nullable = FirstChars(frozenset()), False
+        for branch in av[1]:
+            branch_chars, branch_nullable = _first_chars(branch)
+            chars, nullable = chars | branch_chars, nullable or branch_nullable
+        return chars, nullable
+    raise _UnknownCharsError
+
+
+def _first_chars_of_set(items: list) -> FirstChars:
+    """Get the characters of a character set, e.g. ``[\\t\\s*]``"""
+    literals, categories = set(), []
+    for op, av in items:
+        if op == sre.LITERAL:
+            literals.add(chr(av))
+        elif op == sre.RANGE:
+            low, high = av
+            categories.append(lambda char, low=low, high=high: low <= ord(char) <= high)
+        elif op == sre.CATEGORY and av in _CATEGORIES:
+            categories.append(_CATEGORIES[av])
+        else:
+            raise _UnknownCharsError
+    return FirstChars(frozenset(literals), tuple(categories))
+
+
+@lru_cache(maxsize=None)
+def load_grammar(lang: str) -> "Grammar":
+    """Get the grammar of a language, it is compiled once per process and shared by all parsers
+
+    :param lang: The grammar's language
+    :type lang: ``str``
+    :rtype: ``Grammar``
+    """
+    return Grammar(lang)
+
+
+class Grammar:
+    """The compiled grammar of a language - patterns of its blocks declared in the language's ``tokens.py``,
+    together with their analysis used by the parser.
+    Block classes are not modified, and a grammar is not changed after it is created,
+    so it can be shared by parsers (also ones running in different threads)
+
+    :param lang:
+        The grammar's language
+    :type lang: ``str``
+    """
+
+    def __init__(self, lang: str) -> None:
+        lang_module = importlib.import_module(f"pyndoc.readers.{lang}.tokens")
+
+        self.lang = lang  #: The grammar's language
+        self.block_types = tuple(lang_module.declared_tokens)  #: Types of composite blocks, in order of declaration
+        self.atom_block_types = tuple(lang_module.declared_atomic_patterns)  #: Types of atom blocks
+        self.atom_wrapper = lang_module.atom_wrapper  #: The block wrapping atom blocks found without context
+        self.end_block_types = tuple(lang_module.declared_ends)  #: Types of blocks with declared end patterns
+
+        self._start_patterns = MappingProxyType(
+            {block: re.compile(pattern) for block, (pattern, _) in lang_module.declared_tokens.items()}
+        )
+        self._inline = frozenset(block for block, (_, inline) in lang_module.declared_tokens.items() if inline)
+        self._end_patterns = MappingProxyType(
+            {
+                block: MappingProxyType(
+                    {name: (end, match_width(end)) for name, end in block.end_patterns(re.compile(pattern)).items()}
+                )
+                for block, pattern in lang_module.declared_ends.items()
+            }
+        )
+        self._atom_patterns = MappingProxyType(
+            {block: re.compile(pattern) for block, pattern in lang_module.declared_atomic_patterns.items()}
+        )
+        self._has_content = MappingProxyType(dict(lang_module.atoms_content))
+
+        prose_pattern = getattr(lang_module, "prose_pattern", None)
+        self.prose_pattern = re.compile(prose_pattern) if prose_pattern else None  #: Matches paragraphs of atoms
+        self.prose_atom_pattern = re.compile(getattr(lang_module, "prose_atom_pattern", ""))  #: Splits them into atoms
+        emphasis_pattern = getattr(lang_module, "emphasis_pattern", None)
+        self.emphasis_pattern = (
+            re.compile(emphasis_pattern) if emphasis_pattern else None
+        )  #: Matches paragraphs of atoms and emphasis
+        self.emphasis_reader = getattr(lang_module, "emphasis_reader", None)  #: Reads them in a single pass
+        self.link_reader = getattr(lang_module, "link_reader", None)  #: Resolves links in finished blocks
+
+        self.start_triggers = tuple(
+            (block, first_chars(self.start_pattern(block)), is_anchored(self.start_pattern(block)))
+            for block in self.block_types
+        )  #: Characters which can start a match of each block's start pattern, and if it is anchored
+        self.atom_runs = tuple(
+            is_run(self.atom_pattern(block)) for block in self.atom_block_types
+        )  #: Whether each atom pattern matches runs of characters of a single class
+        self.atom_max_lengths = tuple(
+            max_text_length(self.atom_pattern(block)) for block in self.atom_block_types
+        )  #: The maximum length of a text matched by each atom pattern, None if unknown
+
+    def start_pattern(self, block: type) -> re.Pattern:
+        """Get the start pattern of a block, or of its closest declared base class
+
+        :param block: The block's type
+        :type block: ``type``
+        """
+        return self._lookup(self._start_patterns, block, EMPTY_PATTERN)
+
+    def end_pattern(self, block: type, name: str = "end") -> re.Pattern:
+        """Get an end pattern of a block, or of its closest declared base class
+
+        :param block: The block's type
+        :type block: ``type``
+        :param name: The name of the pattern, for blocks with more than one (see ``end_patterns`` of a block)
+        :type name: ``str``, optional
+        """
+        return self._lookup(self._end_patterns, block, {}).get(name, (EMPTY_PATTERN, None))[0]
+
+    def end_window(self, block: type, name: str = "end") -> int | None:
+        """Get the maximum length of a match of an end pattern of a block
+
+        :param block: The block's type
+        :type block: ``type``
+        :param name: The name of the pattern, defaults to the declared end pattern
+        :type name: ``str``, optional
+        :return: The maximum length, or None if the whole token has to be searched
+            (the pattern has anchors or lookarounds, or can be matched by texts of any length)
+        :rtype: ``int | None``
+        """
+        return self._lookup(self._end_patterns, block, {}).get(name, (EMPTY_PATTERN, None))[1]
+
+    def search_end(self, block: type, token: str, pos: int = 0, name: str = "end") -> re.Match | None:
+        """Search for an end pattern of a block in the part of a token, in which a new match can be found.
+        Since the token before ``pos`` did not match, a new match has to end after ``pos``,
+        so only as many characters before it, as the maximum length of a match, are searched
+
+        :param block: The block's type
+        :type block: ``type``
+        :param token: The current token
+        :type token: ``str``
+        :param pos: Index of the first character not checked before, defaults to 0 (search the whole token)
+        :type pos: ``int``, optional
+        :param name: The name of the pattern, defaults to the declared end pattern
+        :type name: ``str``, optional
+        :return: The first match, as if the whole token was searched
+        :rtype: ``re.Match | None``
+        """
+        pattern, window = self._lookup(self._end_patterns, block, {}).get(name, (EMPTY_PATTERN, None))
+        start = max(0, pos + 1 - window) if window else 0
+        return pattern.search(token, start)
+
+    def atom_pattern(self, block: type) -> re.Pattern:
+        """Get the pattern matching a whole atom block
+
+        :param block: The block's type
+        :type block: ``type``
+        """
+        return self._lookup(self._atom_patterns, block, EMPTY_PATTERN)
+
+    def is_inline(self, block: type) -> bool:
+        """Check if a block was declared as inline
+
+        :param block: The block's type
+        :type block: ``type``
+        """
+        return block in self._inline
+
+    def has_content(self, block: type) -> bool:
+        """Check if an atom block has contents, default: True
+
+        :param block: The block's type
+        :type block: ``type``
+        """
+        return self._has_content.get(block, True)
+
+    @staticmethod
+    def _lookup(declared: MappingProxyType, block: type, default: object) -> object:
+        """Get the value declared for a block, or for its closest base class"""
+        if block in declared:
+            return declared[block]
+        for base in block.__mro__:
+            if base in declared:
+                return declared[base]
+        return default
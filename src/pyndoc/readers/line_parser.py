@@ -0,0 +1,158 @@
+import re
+from pyndoc.ast.basic_blocks import ASTBlock
+from pyndoc.readers.parser import Parser
+
+
+class LineParser(Parser):
+    """Parser reading the input line by line, in two phases.
+
+    First, the input is split into lines, and lines into paragraphs (separated by an empty line).
+    Then, paragraphs starting when no block is open, and containing only atom blocks
+    (matched by the language's ``prose_pattern``), are split into atom blocks in a single pass
+    with ``prose_atom_pattern``. Any other line is processed character by character,
+    exactly as :class:`Parser` does, so both parsers produce the same tree.
+
+    Paragraphs containing emphasis as well (matched by ``emphasis_pattern``) are read in a single pass
+    by the language's ``emphasis_reader``, if it can not read a paragraph (an emphasis is not closed
+    within it), the paragraph is processed character by character.
+
+    Languages not declaring the prose patterns are processed character by character only.
+    The parser should only be driven with ``feed`` and ``finish``
+
+    :param lang:
+        The reader's language
+    :type lang: ``str``
+    :param compiled:
+        Use the parser module generated for the language's grammar, defaults to ``True``
+    :type compiled: ``bool``, optional
+    :param flat:
+        Keep the read blocks in a :class:`FlatTree`, defaults to ``False``
+    :type flat: ``bool``, optional
+    :param text_runs:
+        Keep runs of ``Str``, ``Space`` and ``SoftBreak`` blocks as ``Text`` blocks, defaults to ``False``
+    :type text_runs: ``bool``, optional
+    """
+
+    def __init__(self, lang: str, compiled: bool = True, flat: bool = False, text_runs: bool = False) -> None:
+        super().__init__(lang, compiled, flat, text_runs)
+        self._prose = self._grammar.prose_pattern  #: Matches paragraphs of atom blocks
+        self._prose_atoms = self._grammar.prose_atom_pattern  #: Splits them into atoms
+        self._emphasis = self._grammar.emphasis_pattern  #: Matches paragraphs of atoms and emphasis
+        self._emphasis_reader = self._grammar.emphasis_reader  #: Reads them in a single pass
+
+    def reset(self) -> None:
+        """Forget the parsed document and the pending input, so that the parser can be reused"""
+        super().reset()
+        self._pending = ""  #: Input not processed yet (an incomplete line or paragraph)
+
+    def feed(self, chunk: str) -> list[ASTBlock]:
+        """Process a chunk of the input of any size.
+        Returns top-level blocks completed while processing the chunk.
+        The input is processed up to the last complete line (or paragraph)
+
+        :param chunk: The next part of the input
+        :type chunk: ``str``
+        :return: Newly completed top-level blocks
+        :rtype: ``list[ASTBlock]``
+        """
+        self._pending += chunk
+        self._process_lines()
+        return self._completed_blocks()
+
+    def finish(self) -> list[ASTBlock]:
+        """The input has ended - process the remaining input, then close the context.
+        Returns the remaining top-level blocks, not returned by ``feed`` before
+
+        :return: Newly completed top-level blocks
+        :rtype: ``list[ASTBlock]``
+        """
+        self._process_lines(final=True)
+        return super().finish()
+
+    def _process_lines(self, final: bool = False) -> None:
+        """Process all complete lines of the pending input
+
+        :param final: Process the last line (and paragraph) even if it is not complete
+        :type final: ``bool``
+        """
+        text = self._pending
+        pos = 0
+
+        while pos < len(text):
+            if self._prose and not self.context and not self.token:
+                prose_end = self._prose_end(text, pos, final)
+                if prose_end is None:
+                    break
+                if prose_end > pos:
+                    self._read_paragraph(text[pos:prose_end])
+                    pos = prose_end + 2
+                    continue
+
+            if self._emphasis and not self.context and not self.token:
+                emphasis_end = self._prose_end(text, pos, final, self._emphasis)
+                if emphasis_end is None:
+                    break
+                if emphasis_end > pos and self._read_emphasis(text[pos:emphasis_end]):
+                    pos = emphasis_end + 2
+                    continue
+
+            if self.context and not self.token:
+                pos = self._scan_contents(text, pos, len(text))
+                if pos == len(text):
+                    break
+
+            line_end = text.find("\n", pos)
+            if line_end == -1:
+                if not final:
+                    break
+                line_end = len(text) - 1
+
+            self._scan(text[pos : line_end + 1])
+            pos = line_end + 1
+
+        self._pending = text[pos:]
+
+    def _prose_end(self, text: str, pos: int, final: bool, pattern: re.Pattern | None = None) -> int | None:
+        """Find the end of a paragraph containing only atom blocks, starting at ``pos``
+
+        :param pattern: The pattern matching such paragraphs, defaults to ``prose_pattern``
+        :type pattern: ``re.Pattern | None``, optional
+        :return: The index of the empty line ending the paragraph, ``pos`` if the paragraph
+            is not prose, ``None`` if it is not complete yet
+        :rtype: ``int | None``
+        """
+        match = (pattern or self._prose).match(text, pos)
+        if not match:
+            return pos
+        if text.startswith("\n\n", match.end()):
+            return match.end()
+        if match.end() == len(text) and not final:
+            return None
+        return pos
+
+    def _read_paragraph(self, paragraph: str) -> None:
+        """Split a paragraph into atom blocks and move it to the tree"""
+        for match in self._prose_atoms.finditer(paragraph):
+            self._process_atom_block(match.group())
+        self._end()
+
+    def _read_emphasis(self, paragraph: str) -> bool:
+        """Read a paragraph of atom blocks and emphasis in a single pass, and move it to the tree
+
+        :return: False if the paragraph has to be processed character by character instead
+        :rtype: ``bool``
+        """
+        block = self._emphasis_reader.read(paragraph, self._grammar)
+        if block is None:
+            return False
+        self._append_block(block)
+        return True
+
+    def _get_state(self) -> dict:
+        """Get the parser's state saved in checkpoints, including the pending input"""
+        return {**super()._get_state(), "pending": self._pending}
+
+    def _set_state(self, state: dict) -> None:
+        """Restore the parser's state loaded from a checkpoint, including the pending input"""
+        super()._set_state(state)
+        self._pending = state["pending"]
@@ -1,5 +1,15 @@
-import importlib
+import os
+import pickle
 from pyndoc.ast.ast_tree import ASTTree
+from pyndoc.ast.flat_tree import FlatTree
+from pyndoc.ast.basic_blocks import ASTBlock
+from pyndoc.ast.read_handler import CompositeReadHandler
+from pyndoc.ast.text_runs import coalesce
+from pyndoc.readers.grammar import load_grammar
+from pyndoc.readers.compiler import load_compiled
+
+CHECKPOINT_VERSION = 4  #: Version of the checkpoint format, checkpoints of other versions are rejected
+CHECKPOINT_MAGIC = b"pyndoc-checkpoint\n"  #: Bytes beginning a checkpoint file, followed by its pickled header
 
 
 class Parser:
@@ -8,36 +18,299 @@ class Parser:
     :param lang:
         The reader's language
     :type lang: ``str``
+    :param compiled:
+        Process characters with the parser module generated for the language's grammar
+        (see :mod:`pyndoc.readers.compiler`), instead of interpreting the grammar, defaults to ``True``.
+        Methods processing characters overridden by a subclass are still called
+    :type compiled: ``bool``, optional
+    :param flat:
+        Keep the read blocks in a :class:`FlatTree` instead of an ``ASTTree``,
+        which takes much less memory for large documents, defaults to ``False``
+    :type flat: ``bool``, optional
+    :param text_runs:
+        Replace each run of ``Str``, ``Space`` and ``SoftBreak`` blocks in the read blocks with a single ``Text``
+        block (see :mod:`pyndoc.ast.text_runs`), defaults to ``False``
+    :type text_runs: ``bool``, optional
     """
 
-    def __init__(self, lang: str) -> None:
-        self._tree = ASTTree([])  #: The current AST Tree (blocks already read)
-        self.context = []  #: The context stack
-        self.token = ""  #: Token currently matched
-
-        lang_module = importlib.import_module(f"pyndoc.readers.{lang}.tokens")
-        self._block_types = (
-            lang_module.declared_tokens.keys()
-        )  #: Types of available composite blocks (declared by lang)
-        self._atom_block_types = lang_module.declared_atomic_patterns.keys()  #: Atom block types (declared by lang)
+    def __init__(self, lang: str, compiled: bool = True, flat: bool = False, text_runs: bool = False) -> None:
+        self._lang = lang  #: The parser's language
+        self._flat = flat  #: Whether the tree is a ``FlatTree``
+        self._text_runs = text_runs  #: Whether runs of text are kept as ``Text`` blocks
+        self._grammar = load_grammar(lang)  #: The compiled grammar of the language (shared by parsers)
+        self._block_types = self._grammar.block_types  #: Types of available composite blocks (declared by lang)
+        self._atom_block_types = self._grammar.atom_block_types  #: Atom block types (declared by lang)
         self._atom_wrapper_block = (
-            lang_module.atom_wrapper
+            self._grammar.atom_wrapper
         )  #: The block in which atom blocks will be wrapped if no context is found
 
-        lang_module.assign_patterns()
+        self._start_candidates = {}  #: Blocks which can start in a token, by the token's first character
+        self._atom_runs = [
+            {} if run else None for run in self._grammar.atom_runs
+        ]  #: Characters matching each atom pattern of runs of characters (e.g. ``^[ ]+$``), None for other patterns
+        self._default_end_windows = {}  #: End windows of blocks using the default ``end``, checked in the buffer
+        self._content_scanners = {}  #: Whether blocks consume their contents at once (override ``scan_contents``)
+        self._empty_atom_matches = self._match_atoms("")  #: The atom blocks matching an empty token
+        if compiled:
+            load_compiled(lang).bind(self)
+
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget the parsed document, so that the parser can be reused for the next one.
+        The grammar and the parser's caches are kept
+        """
+        self._tree = FlatTree() if self._flat else ASTTree([])  #: The current AST Tree (blocks already read)
+        self.context = []  #: The context stack
+        self._emitted = 0  #: Amount of blocks from the tree already returned by ``feed`` or ``finish``
+
+        self._buffer = ""  #: The processed input, the token ends at ``_token_end`` of the buffer
+        self._token_start = 0  #: Offset of the beginning of the token in the buffer
+        self._token_end = 0  #: Offset of the end of the token (of the processed part of the buffer)
+        self._token_prefix = ""  #: A part of the token not found in the buffer (if a handler changed it)
+        self._token = ""  #: The token, materialised when needed (None if it was not since it changed)
+        self._token_version = 0  #: Changed when the token changes other than by appending a character
+
+        self._end_checked = (None, 0, 0)  #: The block last checked by ``check_end``, token version and length
+        self._atom_matches = (0, 0, self._empty_atom_matches)  #: The atom blocks matching a token's version and length
+
+    @property
+    def token(self) -> str:
+        """Token currently matched, kept as offsets in the input buffer
+        and only materialised when needed
+        """
+        if self._token is None:
+            self._token = self._token_prefix + self._buffer[self._token_start : self._token_end]
+        return self._token
+
+    @token.setter
+    def token(self, value: str) -> None:
+        if value is self._token:
+            return
+        self._token = value
+        self._token_version += 1
+        if len(value) <= self._token_end and self._buffer.startswith(value, self._token_end - len(value)):
+            self._token_prefix, self._token_start = "", self._token_end - len(value)
+        else:
+            self._token_prefix, self._token_start = value, self._token_end
+
+    def _token_length(self) -> int:
+        """Get the length of the token, without materialising it"""
+        return len(self._token_prefix) + self._token_end - self._token_start
+
+    def _last_char(self) -> str:
+        """Get the last character of a non-empty token, without materialising it"""
+        if self._token_end > self._token_start:
+            return self._buffer[self._token_end - 1]
+        return self._token_prefix[-1]
+
+    def process(self, char: str) -> None:
+        """Process a current token
+        taking into consideration the current context tree, check if
+        a new block has started or ended, process atom blocks
+
+        :param char: The currently processed character
+        :type char: ``str``
+        """
+        self._scan(char)
+
+    def feed(self, chunk: str) -> list[ASTBlock]:
+        """Process a chunk of the input of any size.
+        Returns top-level blocks completed while processing the chunk
+        (blocks moved into the tree, which were not returned before)
+
+        :param chunk: The next part of the input
+        :type chunk: ``str``
+        :return: Newly completed top-level blocks
+        :rtype: ``list[ASTBlock]``
+        """
+        self._scan(chunk)
+        return self._completed_blocks()
+
+    def _scan(self, text: str) -> None:
+        """Append a text to the buffer, then process it character by character.
+        The buffer is replaced with the token and the text, so that it does not grow with the whole input
+
+        :param text: The processed text
+        :type text: ``str``
+        """
+        self._buffer = self._buffer[self._token_start : self._token_end] + text
+        self._token_start, self._token_end = 0, self._token_end - self._token_start
+        while self._token_end < len(self._buffer):
+            if self._token_start == self._token_end and self.context and not self._token_prefix:
+                end = self._scan_contents(self._buffer, self._token_end, len(self._buffer))
+                self._token_start = self._token_end = end
+                if self._token_end == len(self._buffer):
+                    break
+            self._token_end += 1
+            self._token = None
+            self.check_end()
+            self.check_start()
+            self.check_atom_block()
+
+    def _scan_contents(self, text: str, pos: int, endpos: int) -> int:
+        """Let the block on top of the context stack consume its contents at once, if it can.
+        Should only be called when the token is empty
+
+        :param text: The input
+        :type text: ``str``
+        :param pos: Index of the first unprocessed character of the input
+        :type pos: ``int``
+        :param endpos: Index, up to which the input can be consumed
+        :type endpos: ``int``
+        :return: Index of the first character, which was not consumed
+        :rtype: ``int``
+        """
+        block = self.context[-1]
+        scans = self._content_scanners.get(block.__class__)
+        if scans is None:
+            scans = block.scan_contents.__func__ is not CompositeReadHandler.scan_contents.__func__
+            self._content_scanners[block.__class__] = scans
+        if not scans:
+            return pos
+        return block.scan_contents(buffer=text, pos=pos, endpos=endpos, context=self.context, grammar=self._grammar)
+
+    def finish(self) -> list[ASTBlock]:
+        """The input has ended - process what is left in the token and close the context.
+        Returns the remaining top-level blocks, not returned by ``feed`` before
+
+        :return: Newly completed top-level blocks
+        :rtype: ``list[ASTBlock]``
+        """
+        if not self.context:
+            self.process_trailing_atom()
+        self.close_context()
+        return self._completed_blocks()
+
+    def _completed_blocks(self) -> list[ASTBlock]:
+        """Get the blocks added to the tree since the last call (views of them, if the tree is flat)"""
+        blocks = list(self._tree[self._emitted :])
+        self._emitted = len(self._tree)
+        return blocks
+
+    def save_checkpoint(self, filename: str, offset: int, fingerprint: bytes = b"") -> None:
+        """Save the parser's state (the tree, the context stack and the pending token) to a file,
+        so that parsing can be resumed later with ``load_checkpoint``.
+        The state is preceded by a header (the format version, the parser's identity, the offset
+        and the fingerprint), so that an incompatible checkpoint is rejected before its state is loaded.
+        The file is replaced atomically
+
+        :param filename: The checkpoint file
+        :type filename: ``str``
+        :param offset: The byte offset of the input, at which parsing will be resumed
+        :type offset: ``int``
+        :param fingerprint: Bytes of the input before the offset, used to check if it has not changed since
+        :type fingerprint: ``bytes``, optional
+        """
+        header = {"version": CHECKPOINT_VERSION, **self._identity(), "offset": offset, "fingerprint": fingerprint}
+        temp_filename = f"{filename}.tmp"
+        with open(temp_filename, "wb") as fp:
+            fp.write(CHECKPOINT_MAGIC)
+            pickle.dump(header, fp, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(self._get_state(), fp, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_filename, filename)
+
+    def load_checkpoint(self, filename: str) -> tuple[int, bytes]:
+        """Restore the parser's state from a file saved with ``save_checkpoint``.
+        Checkpoints are pickled, only load the ones created by yourself
+
+        :param filename: The checkpoint file
+        :type filename: ``str``
+        :raises ValueError: If the checkpoint was saved in another format or by a different parser
+        :return: The byte offset and the fingerprint the checkpoint was saved with
+        :rtype: ``tuple[int, bytes]``
+        """
+        with open(filename, "rb") as fp:
+            if fp.read(len(CHECKPOINT_MAGIC)) != CHECKPOINT_MAGIC:
+                raise ValueError(f"{filename} is not a checkpoint of this version of pyndoc")
+            header = pickle.load(fp)
+
+            identity = self._identity()
+            if header.get("version") != CHECKPOINT_VERSION or any(header.get(key) != identity[key] for key in identity):
+                raise ValueError(f"Checkpoint {filename} is not compatible with the {self._lang} parser")
+            state = pickle.load(fp)
+
+        self._set_state(state)
+        return header["offset"], header["fingerprint"]
+
+    def _identity(self) -> dict:
+        """Get the values identifying the parser, which must match when loading a checkpoint"""
+        return {"parser": self.__class__.__name__, "lang": self._lang, "flat": self._flat, "text_runs": self._text_runs}
+
+    def _get_state(self) -> dict:
+        """Get the parser's state saved in checkpoints"""
+        return {
+            "tree": self._tree,
+            "emitted": self._emitted,
+            "context": self.context,
+            "token": self.token,
+        }
+
+    def _set_state(self, state: dict) -> None:
+        """Restore the parser's state loaded from a checkpoint"""
+        self._tree = state["tree"]
+        self._emitted = state["emitted"]
+        self.context = state["context"]
+        self.token = state["token"]
 
     def check_atom_block(self) -> None:
         """Check if an atom block has ended.
-        That is, if matching it with a next character results in None (but previously matched)
+        That is, if matching it with a next character results in None (but previously matched).
+        Atoms matching runs of characters are checked only against the last character,
+        when the atoms matching the token before it was appended are known
         """
+        length = self._token_length()
+        version, cached_length, cached_matches = self._atom_matches
+        if version == self._token_version and cached_length == length - 1:
+            matches_prev = cached_matches
+        else:
+            matches_prev = self._match_atoms(self.token[:-1])
+        matches_cur = self._match_atoms(None, matches_prev)
+
+        for index, atom_block in enumerate(self._atom_block_types):
+            if matches_cur[index] or not matches_prev[index] or not atom_block.accepts(self.context):
+                continue
+
+            old_token, self.token = self.token[:-1], self.token[-1:]
+            self._insert_atom_block(self._first_accepted(matches_prev), old_token)
+            matches_prev = self._empty_atom_matches
+            matches_cur = self._match_atoms(None, matches_prev)
 
-        for atom_block in self._atom_block_types:
-            match_cur, self.token = atom_block.match_pattern(text=self.token, context=self.context)
-            match_prev, _ = atom_block.match_pattern(text=self.token[:-1], context=self.context)
+        self._atom_matches = (self._token_version, self._token_length(), matches_cur)
 
-            if not match_cur and match_prev:
-                old_token, self.token = self.token[:-1], self.token[-1:]
-                self._process_atom_block(old_token)
+    def _match_atoms(self, token: str | None, matches_prev: tuple[bool, ...] | None = None) -> tuple[bool, ...]:
+        """Match the text of a token against each atom block's pattern, regardless of the context.
+        The current token is only materialised if a pattern has to be matched against all of it
+
+        :param token: The matched token, None for the current token
+        :type token: ``str | None``
+        :param matches_prev: The matches of the token without its last character, if known
+        :type matches_prev: ``tuple[bool, ...] | None``, optional
+        :return: Whether each atom block matches the token
+        :rtype: ``tuple[bool, ...]``
+        """
+        length = self._token_length() if token is None else len(token)
+        char = (self._last_char() if token is None else token[-1]) if length else ""
+        matches = []
+        for atom_block, run, max_length, matched_prev in zip(
+            self._atom_block_types, self._atom_runs, self._grammar.atom_max_lengths, matches_prev or self._atom_runs
+        ):
+            if run is not None and matches_prev is not None and length:
+                matched = run.get(char)
+                if matched is None:
+                    matched = run[char] = atom_block.match_text(char, self._grammar) is not None
+                matches.append(matched and (length == 1 or matched_prev))
+            elif max_length is not None and length > max_length:
+                matches.append(False)
+            else:
+                matches.append(atom_block.match_text(self.token if token is None else token, self._grammar) is not None)
+        return tuple(matches)
+
+    def _first_accepted(self, matches: tuple[bool, ...]) -> type:
+        """Get the first atom block, which matches a token, and is accepted in the current context"""
+        for index, atom_block in enumerate(self._atom_block_types):
+            if matches[index] and atom_block.accepts(self.context):
+                return atom_block
 
     def _process_atom_block(self, token: str) -> None:
         """process an atom block (Str, Space etc.)
@@ -50,24 +323,49 @@ class Parser:
         atom_block = [
             atom_block
             for atom_block in self._atom_block_types
-            if atom_block.match_pattern(text=token, context=self.context)[0]
+            if atom_block.match_pattern(text=token, context=self.context, grammar=self._grammar)[0]
         ]
         if not atom_block:
             return
+        self._insert_atom_block(atom_block[0], token)
+
+    def _insert_atom_block(self, atom_block: type, token: str) -> None:
+        """Insert an atom block into the current context, or into the atom wrapper if there is no context
+
+        :param atom_block: The type of the atom block
+        :type atom_block: ``type``
+        :param token: The token matched by the atom block
+        :type token: ``str``
+        """
         if not self.context:
             self.context.append(self._atom_wrapper_block())
 
-        args = tuple([token]) if atom_block[0].block_has_content() else ()
-        self.context[-1].insert(atom_block[0](*args))
+        # blocks without contents are not created for each occurrence, all of them are the same instance
+        self.context[-1].insert(atom_block(token) if self._grammar.has_content(atom_block) else atom_block.shared())
 
     def check_end(self) -> None:
-        """check if the current context block has ended"""
-        if len(self.context):
-            end_match, new_token = self.context[-1].end(token=self.token, context=self.context)
-        else:
-            end_match, new_token = self._atom_wrapper_block.end(token=self.token, context=self.context)
+        """check if the current context block has ended.
+        If the block has already checked the token before the last character was appended,
+        and it did not end, only the new part of the token has to be checked (passed to ``end`` as ``pos``).
+        Blocks using the default ``end`` are checked directly in the input buffer
+        """
+        block = self.context[-1] if self.context else self._atom_wrapper_block
+        checked_block, checked_version, checked_length = self._end_checked
+        pos = checked_length if block is checked_block and checked_version == self._token_version else 0
+
+        block_type = block.__class__ if self.context else block
+        if block_type not in self._default_end_windows:
+            uses_default_end = block.end.__func__ is CompositeReadHandler.end.__func__
+            self._default_end_windows[block_type] = self._grammar.end_window(block_type) if uses_default_end else None
+        window = self._default_end_windows[block_type]
+        if window and not self._token_prefix:
+            self._check_default_end(block, pos, window)
+            return
+
+        end_match, new_token = block.end(token=self.token, context=self.context, grammar=self._grammar, pos=pos)
         if not end_match:
             self.token = new_token
+            self._end_checked = (block, self._token_version, len(new_token))
             return
 
         # process token before the block-end
@@ -76,24 +374,60 @@ class Parser:
 
         self._end()
 
+    def _check_default_end(self, block: ASTBlock | type, pos: int, window: int) -> None:
+        """Check if a block using the default ``end`` has ended, searching its end pattern
+        in the buffer (only in the part of the token in which a new match can be found)
+        """
+        block_type = block.__class__ if self.context else block
+        start = self._token_start
+        match = self._grammar.end_pattern(block_type).search(
+            self._buffer, max(start, start + pos + 1 - window), self._token_end
+        )
+        if not match:
+            self._end_checked = (block, self._token_version, self._token_length())
+            return
+
+        # process token before the block-end
+        self._process_atom_block(self._buffer[start : match.start()])
+        self.token = self._buffer[match.end() : self._token_end]
+
+        self._end()
+
     def _end(self) -> None:
         """Move a processed blocks to the finished tree"""
         if len(self.context) > 1:
             item = self.context.pop()
             self.context[-1].insert(item)
         elif self.context:
-            self._tree.append(self.context.pop())
+            self._append_block(self.context.pop())
+
+    def _append_block(self, block: ASTBlock) -> None:
+        """Move a finished top-level block to the tree, resolving its links first (if the language declares how),
+        and joining its runs of text in the text run mode
+        """
+        if self._grammar.link_reader:
+            self._grammar.link_reader.resolve(block)
+        if self._text_runs:
+            coalesce(block)
+        self._tree.append(block)
 
     def check_start(self) -> None:
         """Check if a new block has just started.
         If so, set the current context as the block
         """
-        for block in self._block_types:
-            start_match, new_token = block.start(token=self.token, context=self.context)
+        first_char = self._token_prefix[:1] or self._buffer[self._token_start : self._token_start + 1]
+        candidates = self._start_candidates.get(first_char)
+        if candidates is None:
+            candidates = self._start_candidates[first_char] = self._get_start_candidates(first_char)
+
+        for block, needles in candidates:
+            if needles and not self._token_contains(needles):
+                continue
+            start_match, new_token = block.start(token=self.token, context=self.context, grammar=self._grammar)
             if not start_match:
                 self.token = new_token
                 continue
-            if block.is_inline() and not self.context:
+            if self._grammar.is_inline(block) and not self.context:
                 self.context.append(self._atom_wrapper_block())
             else:
                 self._process_atom_block(self.token[: start_match.start()])
@@ -103,12 +437,47 @@ class Parser:
             self.context[-1].process_read(match=start_match, context=self.context)
             break
 
+    def _token_contains(self, needles: tuple[str, ...]) -> bool:
+        """Check if any of the texts is a part of the token, without materialising it"""
+        if self._token_prefix:
+            return any(needle in self.token for needle in needles)
+        for needle in needles:
+            if self._buffer.find(needle, self._token_start, self._token_end) != -1:
+                return True
+        return False
+
+    def _get_start_candidates(self, char: str) -> list[tuple[type, tuple[str, ...] | None]]:
+        """Get the blocks which can start in a token beginning with a given character.
+        A block's start pattern anchored at the beginning of a token can only match if the character
+        can start it, other patterns need one of their first characters (needles) to be in the token.
+        Blocks with patterns which could not be analysed are always checked
+
+        :param char: The first character of a token (empty for an empty token)
+        :type char: ``str``
+        :return: Blocks, in order of declaration, with needles to look for in the token
+        :rtype: ``list[tuple[type, tuple[str, ...] | None]]``
+        """
+        candidates = []
+        for block, chars, anchored in self._grammar.start_triggers:
+            if chars is None:
+                candidates.append((block, None))
+            elif anchored:
+                if char and char in chars:
+                    candidates.append((block, None))
+            elif not chars.categories:
+                candidates.append((block, tuple(chars.literals)))
+            else:
+                candidates.append((block, None))
+        return candidates
+
     def close_context(self) -> None:
         """
         If the file has ended - go through each block in the context and end it
         """
         while self.context:
-            self.token = self.context[-1].handle_premature_closure(token=self.token, context=self.context)
+            self.token = self.context[-1].handle_premature_closure(
+                token=self.token, context=self.context, grammar=self._grammar
+            )
             self.process_trailing_atom()
             self._end()
 
@@ -1,9 +1,65 @@
+import io
+import os
+import mmap
+import pickle
+import asyncio
+import stat
+import codecs
+import locale
+from typing import AsyncIterable, BinaryIO, TextIO
 from pyndoc.readers.parser import Parser
 
+BLOCK_SIZE = 64 * 1024  #: Default amount of characters (or bytes, when memory-mapped) read from a file at once
+FINGERPRINT_SIZE = 256  #: Amount of bytes before a checkpoint's offset used to check if a file has changed
+
 
 class Reader:
-    def __init__(self, lang: str) -> None:
-        self._parser = Parser(lang)
+    """Class feeding the contents of a file to a :class:`Parser`
+
+    :param lang:
+        The reader's language
+    :type lang: ``str``
+    :param block_size:
+        The amount of characters read from a file at once, defaults to ``BLOCK_SIZE``
+    :type block_size: ``int``, optional
+    :param use_mmap:
+        Memory-map regular files instead of reading them, defaults to ``False``
+    :type use_mmap: ``bool``, optional
+    :param encoding:
+        Encoding of the read files, defaults to the platform's default encoding
+    :type encoding: ``str | None``, optional
+    :param parser_class:
+        The parser used, e.g. :class:`LineParser`, defaults to :class:`Parser`
+    :type parser_class: ``type[Parser]``, optional
+    :param flat:
+        Keep the read document in a :class:`FlatTree`, which takes much less memory, defaults to ``False``
+    :type flat: ``bool``, optional
+    :param text_runs:
+        Keep runs of words, spaces and soft breaks as single ``Text`` blocks, defaults to ``False``
+    :type text_runs: ``bool``, optional
+    """
+
+    def __init__(
+        self,
+        lang: str,
+        block_size: int = BLOCK_SIZE,
+        use_mmap: bool = False,
+        encoding: str | None = None,
+        parser_class: type[Parser] = Parser,
+        flat: bool = False,
+        text_runs: bool = False,
+    ) -> None:
+        if block_size < 1:
+            raise ValueError(f"Block size must be a positive integer, got: {block_size}")
+
+        self._parser = parser_class(lang, flat=flat, text_runs=text_runs)
+        self._block_size = block_size
+        self._use_mmap = use_mmap
+        self._encoding = encoding
+
+    def reset(self) -> None:
+        """Forget the read document, so that the reader (and its parser) can be reused for the next one"""
+        self._parser.reset()
 
     def process(self, char: str) -> None:
         """Process a current token
@@ -13,22 +69,172 @@ class Reader:
         :param char: The currently processed character
         :type char: ``str``
         """
-        self._parser.token += char
-        self._parser.check_end()
-        self._parser.check_start()
-        self._parser.check_atom_block()
+        self._parser.process(char)
 
     def read(self, filename: str) -> None:
-        """Open and read a file one character at a time,
-        then pass the character to tokenizer
-        """
-        with open(filename, "r") as fp:
-            while True:
-                char = fp.read(1)
-                if not char:
-                    if not self._parser.context:
-                        self._parser.process_trailing_atom()
-                    self._parser.close_context()
-                    break
-
-                self.process(char)
+        """Open and read a file in blocks of ``block_size`` characters,
+        then pass each character of a block to tokenizer.
+        If ``use_mmap`` is set, regular files are memory-mapped instead,
+        other files (e.g. pipes) are read normally
+        """
+        if not self._use_mmap:
+            with open(filename, "r", encoding=self._encoding) as fp:
+                self.read_stream(fp)
+            return
+
+        with open(filename, "rb") as fp:
+            if not self._is_mappable(fp):
+                self.read_stream(fp)
+                return
+            with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                self._read_buffer(buffer)
+        self._close()
+
+    def read_string(self, text: str) -> None:
+        """Read a document held in memory
+
+        :param text: The document's contents
+        :type text: ``str``
+        """
+        self._process_chunk(text)
+        self._close()
+
+    def read_stream(self, fp: TextIO | BinaryIO) -> None:
+        """Read a document from an open file-like object, ``block_size`` characters at a time.
+        Binary streams are decoded with the reader's encoding, translating newlines
+        the same way as when reading a file in text mode.
+        The stream is not closed afterwards
+
+        :param fp: The stream to read, any object with a ``read(size)`` method
+        :type fp: ``TextIO | BinaryIO``
+        """
+        decoder = None
+        while chunk := fp.read(self._block_size):
+            if isinstance(chunk, bytes):
+                decoder = decoder or self._decoder()
+                chunk = decoder.decode(chunk)
+            self._process_chunk(chunk)
+
+        if decoder:
+            self._process_chunk(decoder.decode(b"", final=True))
+        self._close()
+
+    async def read_async(self, source: asyncio.StreamReader | AsyncIterable[str | bytes]) -> None:
+        """Read a document from an asyncio stream, or any asynchronous iterable of ``str`` or ``bytes`` chunks.
+        Chunks are parsed ``block_size`` characters at a time, control is given back to the event loop
+        after each part, so that parsing a large document does not block other tasks.
+        Bytes are decoded the same way as in ``read_stream``
+
+        :param source: The stream or iterable to read
+        :type source: ``asyncio.StreamReader | AsyncIterable[str | bytes]``
+        """
+        decoder = None
+        async for chunk in self._async_chunks(source):
+            if isinstance(chunk, bytes):
+                decoder = decoder or self._decoder()
+                chunk = decoder.decode(chunk)
+            for start in range(0, len(chunk), self._block_size):
+                self._parser.feed(chunk[start : start + self._block_size])
+                await asyncio.sleep(0)
+
+        if decoder:
+            self._process_chunk(decoder.decode(b"", final=True))
+        self._close()
+
+    async def _async_chunks(
+        self, source: asyncio.StreamReader | AsyncIterable[str | bytes]
+    ) -> AsyncIterable[str | bytes]:
+        """Iterate over chunks of an asynchronous source, an ``asyncio.StreamReader``
+        is read ``block_size`` bytes at a time instead of line by line
+        """
+        if not isinstance(source, asyncio.StreamReader):
+            async for chunk in source:
+                yield chunk
+            return
+
+        while chunk := await source.read(self._block_size):
+            yield chunk
+
+    def read_appended(self, filename: str, checkpoint: str) -> None:
+        """Read a file which only grows by appending to it, resuming from a checkpoint.
+        Only the bytes appended since the checkpoint was saved are parsed, if the checkpoint
+        is missing (or can not be loaded) or the file was changed before its offset, the whole file is parsed.
+        A new checkpoint is saved at the end of the file, before the context is closed
+
+        :param filename: The read file
+        :type filename: ``str``
+        :param checkpoint: The checkpoint file, created if it does not exist
+        :type checkpoint: ``str``
+        """
+        with open(filename, "rb") as fp:
+            offset = self._resume(fp, checkpoint)
+            fp.seek(offset)
+
+            decoder = self._decoder()
+            while chunk := fp.read(self._block_size):
+                offset += len(chunk)
+                self._parser.feed(decoder.decode(chunk))
+
+            # bytes of an incomplete character, and a carriage return which may be followed by
+            # a newline, are parsed again when resuming
+            pending, flag = decoder.getstate()
+            offset -= len(pending) + (flag & 1)
+
+            fp.seek(max(0, offset - FINGERPRINT_SIZE))
+            fingerprint = fp.read(offset - fp.tell())
+
+        self._parser.save_checkpoint(checkpoint, offset, fingerprint)
+        # the file may end within a character which is still being written, its bytes are
+        # not a part of the document yet, only a pending carriage return ends a line
+        if flag & 1:
+            self._parser.feed("\n")
+        self._close()
+
+    def _resume(self, fp: BinaryIO, checkpoint: str) -> int:
+        """Restore the parser's state from a checkpoint, if it matches the file
+
+        :return: The offset, at which reading should be resumed
+        :rtype: ``int``
+        """
+        if not os.path.exists(checkpoint):
+            return 0
+
+        try:
+            offset, fingerprint = self._parser.load_checkpoint(checkpoint)
+        except (OSError, ValueError, EOFError, pickle.UnpicklingError):
+            # a checkpoint saved by another version (or parser), or a damaged one, is not used
+            self._parser.reset()
+            return 0
+        fp.seek(max(0, offset - len(fingerprint)))
+        if offset > os.fstat(fp.fileno()).st_size or fp.read(len(fingerprint)) != fingerprint:
+            self._parser.reset()
+            return 0
+        return offset
+
+    @staticmethod
+    def _is_mappable(fp: BinaryIO) -> bool:
+        """Check if a file can be memory-mapped, that is - if it is a non-empty regular file"""
+        file_stat = os.fstat(fp.fileno())
+        return stat.S_ISREG(file_stat.st_mode) and file_stat.st_size > 0
+
+    def _decoder(self) -> io.IncrementalNewlineDecoder:
+        """Create an incremental decoder for the reader's encoding, translating newlines
+        the same way as when reading a file in text mode
+        """
+        encoding = self._encoding or locale.getpreferredencoding(False)
+        return io.IncrementalNewlineDecoder(codecs.getincrementaldecoder(encoding)(), translate=True)
+
+    def _read_buffer(self, buffer: mmap.mmap) -> None:
+        """Decode a memory-mapped file ``block_size`` bytes at a time and pass it to tokenizer"""
+        decoder = self._decoder()
+        for start in range(0, len(buffer), self._block_size):
+            self._process_chunk(decoder.decode(buffer[start : start + self._block_size]))
+        self._process_chunk(decoder.decode(b"", final=True))
+
+    def _process_chunk(self, chunk: str) -> None:
+        """Pass every character of a chunk to tokenizer"""
+        self._parser.feed(chunk)
+
+    def _close(self) -> None:
+        """The input has ended - process what is left in the token and close the context"""
+        self._parser.finish()
@@ -3,11 +3,14 @@ from pyndoc.ast.blocks import (
     Space,
     Str,
     SoftBreak,
+    Text,
     Header,
     Para,
     Emph,
     Strong,
     Code,
+    Link,
+    Image,
     CodeBlock,
     BulletList,
     Plain,
@@ -30,26 +33,32 @@ class LatexWriter:
             "Emph": self._process_emph,
             "Strong": self._process_strong,
             "Code": self._process_code,
+            "Link": self._process_link,
+            "Image": self._process_image,
             "CodeBlock": self._process_code_block,
             "Header": self._process_header,
             "BulletList": self._process_bullet_list,
             "OrderedList": self._process_ordered_list,
             "Table": self._process_table,
             "Str": self._process_str,
+            "Text": self._process_text,
             "Space": self._process_space,
             "SoftBreak": self._process_soft_break,
         }
+        self._packages = set()  # packages used by the processed blocks
 
     def _get_latex_representation(self, ast_tree: list[ASTBlock]) -> str:
         """
         Converts the given AST tree into a LaTeX document.
 
-        :param ast_tree: List of AST blocks representing the document structure.
+        :param ast_tree: List of AST blocks representing the document structure (an ``ASTTree`` or a ``FlatTree``).
         :return: String containing the LaTeX representation of the document.
         """
-        result = "\\documentclass{article}\n\\begin{document}\n"
-        result += "\n".join(self._process_block(block) for block in ast_tree)
-        result += "\n\\end{document}"
+        self._packages = set()
+        body = "\n".join(self._process_block(block) for block in ast_tree)
+        result = "\\documentclass{article}\n"
+        result += "".join(f"\\usepackage{{{package}}}\n" for package in sorted(self._packages))
+        result += f"\\begin{{document}}\n{body}\n\\end{{document}}"
         return result
 
     def _process_block(self, block: ASTBlock) -> str:
@@ -98,6 +107,26 @@ class LatexWriter:
         """
         return f"\\texttt{{{block.contents}}}"
 
+    def _process_link(self, block: Link) -> str:
+        """
+        Processes a link, the ``hyperref`` package is added to the document's preamble.
+
+        :param block: The link block.
+        :return: The LaTeX representation of the link.
+        """
+        self._packages.add("hyperref")
+        return f"\\href{{{block.contents.metadata[0]}}}{{{self._process_contents(block.contents.contents)}}}"
+
+    def _process_image(self, block: Image) -> str:
+        """
+        Processes an image, the ``graphicx`` package is added to the document's preamble.
+
+        :param block: The image block.
+        :return: The LaTeX representation of the image.
+        """
+        self._packages.add("graphicx")
+        return f"\\includegraphics{{{block.contents.metadata[0]}}}"
+
     def _process_code_block(self, block: CodeBlock) -> str:
         """
         Processes a block of code.
@@ -185,6 +214,15 @@ class LatexWriter:
         """
         return block.contents
 
+    def _process_text(self, block: Text) -> str:
+        """
+        Processes a run of text (words, spaces and soft breaks) at once.
+
+        :param block: The text block.
+        :return: The LaTeX representation of the text.
+        """
+        return block.contents
+
     def _process_space(self, block: Space) -> str:
         """
         Processes a space block.
@@ -3,11 +3,14 @@ from pyndoc.ast.blocks import (
     Space,
     Str,
     SoftBreak,
+    Text,
     Header,
     Para,
     Emph,
     Strong,
     Code,
+    Link,
+    Image,
     CodeBlock,
     BulletList,
     Plain,
@@ -30,12 +33,15 @@ class TypstWriter:
             "Emph": self._process_emph,
             "Strong": self._process_strong,
             "Code": self._process_code,
+            "Link": self._process_link,
+            "Image": self._process_image,
             "CodeBlock": self._process_code_block,
             "Header": self._process_header,
             "BulletList": self._process_bullet_list,
             "OrderedList": self._process_ordered_list,
             "Table": self._process_table,
             "Str": self._process_str,
+            "Text": self._process_text,
             "Space": self._process_space,
             "SoftBreak": self._process_soft_break,
         }
@@ -44,7 +50,7 @@ class TypstWriter:
         """
         Converts the given AST tree into a Typst document.
 
-        :param ast_tree: List of AST blocks representing the document structure.
+        :param ast_tree: List of AST blocks representing the document structure (an ``ASTTree`` or a ``FlatTree``).
         :return: String containing the Typst representation of the document.
         """
         result = ""
@@ -101,6 +107,35 @@ class TypstWriter:
         """
         return f"`{block.contents}`"
 
+    def _process_link(self, block: Link) -> str:
+        """
+        Processes a link.
+
+        :param block: The link block.
+        :return: The Typst representation of the link.
+        """
+        return f"#link({self._string(block.contents.metadata[0])})[{self._process_contents(block.contents.contents)}]"
+
+    def _process_image(self, block: Image) -> str:
+        """
+        Processes an image, its description is used as the alternative text.
+
+        :param block: The image block.
+        :return: The Typst representation of the image.
+        """
+        alt = self._string(self._process_contents(block.contents.contents))
+        return f"#image({self._string(block.contents.metadata[0])}, alt: {alt})"
+
+    @staticmethod
+    def _string(text: str) -> str:
+        """
+        Quotes a text as a Typst string literal.
+
+        :param text: The quoted text.
+        :return: The string literal.
+        """
+        return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
     def _process_code_block(self, block: CodeBlock) -> str:
         """
         Processes a block of code.
@@ -184,6 +219,15 @@ class TypstWriter:
         """
         return block.contents
 
+    def _process_text(self, block: Text) -> str:
+        """
+        Processes a run of text (words, spaces and soft breaks) at once.
+
+        :param block: The text block.
+        :return: The Typst representation of the text.
+        """
+        return block.contents
+
     def _process_space(self, block: Space) -> str:
         """
         Processes a space block.
@@ -0,0 +1,10 @@
+import pytest
+from pyndoc.readers.compiler import CACHE_ENV
+
+
+@pytest.fixture(autouse=True, scope="session")
+def compiled_cache(tmp_path_factory):
+    # parsers generate their compiled modules in a temporary directory, not in the user's cache
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv(CACHE_ENV, str(tmp_path_factory.mktemp("pyndoc_cache")))
+        yield
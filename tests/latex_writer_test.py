@@ -154,3 +154,60 @@ def test_mixed_latex(gfm_reader, latex_writer, mocker, data, expected_latex):
     generated_latex = latex_writer._get_latex_representation(ast_tree)
 
     assert generated_latex.strip() == expected_latex.strip()
+
+
+@pytest.mark.parametrize(
+    ("data", "expected_latex"),
+    [
+        (
+            "A [*link*](http://a.b) and ![an image](img.png)",
+            "\\documentclass{article}\n\\usepackage{graphicx}\n\\usepackage{hyperref}\n\\begin{document}\n"
+            "A \\href{http://a.b}{\\emph{link}} and \\includegraphics{img.png}\n\n\\end{document}",
+        ),
+    ],
+)
+@mock_file
+def test_links_to_latex(gfm_reader, latex_writer, mocker, data, expected_latex):
+    gfm_reader.read("test_links.md")
+
+    generated_latex = latex_writer._get_latex_representation(gfm_reader._parser._tree)
+
+    assert generated_latex.strip() == expected_latex.strip()
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        "# Header\nA paragraph with *emphasis*, **bold** and `code`.\n\n- Item 1\n  1. Nested\n- Item 2",
+        "| a | b |\n| - | :-: |\n| `c` | *d* |\n\n```py\ncode\n```\n\nA [link](http://a.b) and ![image](img.png)",
+    ],
+)
+@mock_file
+def test_flat_tree_to_latex(latex_writer, mocker, data):
+    reader = Reader("gfm")
+    reader.read("test.md")
+    flat_reader = Reader("gfm", flat=True)
+    flat_reader.read("test.md")
+
+    flat_latex = latex_writer._get_latex_representation(flat_reader._parser._tree)
+
+    assert flat_latex == latex_writer._get_latex_representation(reader._parser._tree)
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        "# Header\nA paragraph with *emphasis*, **bold** and `code`,\nover two lines.\n\n- Item 1\n  1. Nested",
+        "| a b | c |\n| - | :-: |\n| `c` | *d e* |\n\nA [link](http://a.b) and ![an image](img.png)",
+    ],
+)
+@mock_file
+def test_text_runs_to_latex(latex_writer, mocker, data):
+    reader = Reader("gfm")
+    reader.read("test.md")
+    runs_reader = Reader("gfm", text_runs=True)
+    runs_reader.read("test.md")
+
+    runs_latex = latex_writer._get_latex_representation(runs_reader._parser._tree)
+
+    assert runs_latex == latex_writer._get_latex_representation(reader._parser._tree)
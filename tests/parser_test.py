@@ -0,0 +1,519 @@
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from pyndoc.readers.compiler import (
+    CACHE_ENV,
+    compiled_path,
+    generate_source,
+    load_compiled,
+    source_key,
+    write_compiled,
+)
+from pyndoc.readers.grammar import Grammar, first_chars, is_anchored, is_run, load_grammar, match_width
+from pyndoc.readers.parser import Parser
+from pyndoc.readers.line_parser import LineParser
+from pyndoc.readers.gfm.blocks import EmphasisReader
+import pyndoc.readers.gfm.tokens as gfm_tokens
+import pyndoc.ast.blocks as ast
+from pyndoc.ast.basic_blocks import ASTCompositeBlock
+from pyndoc.ast.flat_tree import NO_NODE, FlatTree
+from pyndoc.ast.text_runs import coalesce, expand
+
+
+@pytest.fixture
+def gfm_parser():
+    return Parser("gfm")
+
+
+def parse(text):
+    parser = Parser("gfm")
+    parser.feed(text)
+    parser.finish()
+    return parser._tree
+
+
+def parse_by_char(text):
+    # a reference parser, never reading the contents of blocks at once
+    parser = Parser("gfm")
+    for char in text:
+        parser.token += char
+        parser.check_end()
+        parser.check_start()
+        parser.check_atom_block()
+    parser.finish()
+    return parser._tree
+
+
+@pytest.mark.parametrize(
+    ("data", "chunk_size"),
+    [
+        ("# header\nparagraph with *italic* text\n\n- list\n  - nested", 1),
+        ("| a | b |\n| - | :-: |\n| c | d |\n\n```py\ncode\n```", 4),
+        ("para1\n\npara2\n\n**bold** and `code` here\nnext line", 5),
+    ],
+)
+def test_feed_chunks(gfm_parser, data, chunk_size):
+    blocks = []
+    for start in range(0, len(data), chunk_size):
+        blocks += gfm_parser.feed(data[start : start + chunk_size])
+    blocks += gfm_parser.finish()
+
+    assert blocks == gfm_parser._tree.data
+    assert str(gfm_parser._tree) == str(parse(data))
+
+
+def test_feed_returns_completed_blocks(gfm_parser):
+    assert gfm_parser.feed("# header") == []
+    header = gfm_parser.feed("\npara")
+    assert len(header) == 1 and isinstance(header[0], ast.Header)
+    assert gfm_parser.feed("graph") == []
+    para = gfm_parser.feed("\n\n")
+    assert len(para) == 1 and isinstance(para[0], ast.Para)
+    assert gfm_parser.finish() == []
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        "plain prose paragraph\nwith  two lines \n\nand another one\n\n",
+        "para1\n\n\npara2 is dropped by the character parser\n\npara3",
+        "- list\n\n1. ordered\n\n12 is not a list\n- but inside a paragraph\n\n",
+        "# header\nprose after header\n\n *space first*\n\nline\n \nwith spaces",
+        "| a | b |\n| - | - |\n\nprose `code` and **bold**\n\n```\nprose\n\nin code\n```\n\nend\n",
+        "*emph* and **strong**\n\nab**cd** *e **f** g* **h *i* j**\n\n***k*** a*b* c**d**\n\n",
+        "*not closed\n\nat the end",
+        "para\n\n** not *closed* either\n\nend",
+    ],
+)
+@pytest.mark.parametrize("chunk_size", [1, 3, 1000])
+def test_line_parser(data, chunk_size):
+    line_parser = LineParser("gfm")
+    for start in range(0, len(data), chunk_size):
+        line_parser.feed(data[start : start + chunk_size])
+    line_parser.finish()
+    assert str(line_parser._tree) == str(parse(data))
+
+
+@pytest.mark.parametrize(
+    ("pattern", "anchored", "matching", "not_matching"),
+    [
+        (r"^(?:\n)*(?P<h>#{1,6}) ", True, "#\n", "a *"),
+        (r"^(?P<s>[\t\s]*)(?P<num>\d{1,9})(?P<sep>[\.|)])", True, " \t1", "a-"),
+        (r"\*[^*]{1}", False, "*", "a_ "),
+        (r"(?=\S)ab|c+", False, "ac", "bC"),
+    ],
+)
+def test_first_chars(pattern, anchored, matching, not_matching):
+    pattern = re.compile(pattern)
+    chars = first_chars(pattern)
+
+    assert is_anchored(pattern) == anchored
+    assert all(char in chars for char in matching)
+    assert not any(char in chars for char in not_matching)
+
+
+@pytest.mark.parametrize("pattern", ["", "a*", "(?i)a", r"[^a]b", "(a)?"])
+def test_first_chars_unknown(pattern):
+    assert first_chars(re.compile(pattern)) is None
+
+
+def test_start_candidates(gfm_parser):
+    headers = [block.__name__ for block, _ in gfm_parser._get_start_candidates("#")]
+    assert headers == ["Header", "Strong", "Emph"]
+    assert [block.__name__ for block, _ in gfm_parser._get_start_candidates("")] == ["Strong", "Emph"]
+
+
+@pytest.mark.parametrize(
+    ("pattern", "width"),
+    [
+        (r"\n\n", 2),
+        (r"\*[^*]{1}", 2),
+        (r"a{1,5}b", 6),
+        (r" *\|", None),
+        (r"\n?", None),
+        (r"^[^\|]", None),
+        (r"a(?=b)", None),
+    ],
+)
+def test_match_width(pattern, width):
+    assert match_width(re.compile(pattern)) == width
+
+
+@pytest.mark.parametrize("token", ["word\n\n", "a\n\nb\n\n", "\n\n\n", "long" * 50 + "\n"])
+def test_search_end_window(token):
+    grammar = Grammar("gfm")
+    full_match = grammar.end_pattern(ast.Para).search(token)
+    for pos in range(len(token)):
+        if grammar.end_pattern(ast.Para).search(token[:pos]):
+            break
+        match = grammar.search_end(ast.Para, token, pos)
+        assert (match and match.span()) == (full_match and full_match.span())
+
+
+@pytest.mark.parametrize(
+    ("pattern", "run"),
+    [
+        (r"^[ ]+$", True),
+        (r"^[^\s\n]+$", True),
+        (r"^.+\Z", True),
+        (r"^\n", False),
+        (r"^a*$", False),
+        (r"(?m)^a+$", False),
+    ],
+)
+def test_is_run(pattern, run):
+    assert is_run(re.compile(pattern)) == run
+
+
+def test_patterns_without_re_internals(monkeypatch):
+    monkeypatch.setattr("pyndoc.readers.grammar.sre_parse", None)
+    pattern = re.compile(r"^[ ]+$")
+    assert not is_anchored(pattern) and not is_run(pattern)
+    assert first_chars(pattern) is None and match_width(re.compile("ab")) is None
+    # patterns which can not be analysed are checked for each token, the tree is the same
+    monkeypatch.setattr("pyndoc.readers.parser.load_grammar", Grammar)
+    parser = Parser("gfm", compiled=False)
+    assert parser._grammar is not load_grammar("gfm") and not any(parser._grammar.atom_runs)
+    data = "# a\n\n**b** *c*  `d`\n\n- e\n  - f\n"
+    parser.feed(data)
+    parser.finish()
+    assert str(parser._tree) == str(parse(data))
+
+
+@pytest.mark.parametrize(
+    "data",
+    ["word " * 20 + "\n" + "x" * 300, "a  b\n c\n\n- d  e\n  - f", "**a b** *c*  `d  e` f\n"],
+)
+def test_atom_runs(data):
+    parser = Parser("gfm")
+    for char in data:
+        parser.process(char)
+        # atoms matched one character at a time are the same as when matching the whole token
+        version, length, matches = parser._atom_matches
+        assert (version, length) == (parser._token_version, len(parser.token))
+        assert matches == parser._match_atoms(parser.token)
+    parser.finish()
+    assert str(parser._tree) == str(parse(data))
+
+
+def test_token_buffer(gfm_parser):
+    gfm_parser.feed("ab")
+    assert gfm_parser.token == "ab" and gfm_parser._buffer == "ab"
+    # a suffix of the buffer is kept as offsets, any other text as a prefix of the token
+    gfm_parser.token = "b"
+    assert (gfm_parser._token_prefix, gfm_parser._token_start, gfm_parser._token_end) == ("", 1, 2)
+    gfm_parser.token = "x"
+    assert (gfm_parser._token_prefix, gfm_parser._token_start, gfm_parser._token_end) == ("x", 2, 2)
+    gfm_parser.feed("c")
+    assert gfm_parser.token == "xc" and gfm_parser._buffer == "c"
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        "```py\nx = 1\n``\n`` `\ny\n```\nafter",
+        "```\n```\n\n```\n\n```",
+        "```\n\n```\n\nafter",
+        "para `a`` b` and ``c ` d`` `` e`",
+        "```\n" + "line of code\n" * 50 + "```\n\n`" + "x" * 100 + "`",
+        "| a | b |\n| - | :-: |\n| x |  y z |\n| 1. | - q |\n|  |\n| *e* | `c` |\n| t  | u|\n| s |x\n\nafter",
+        "|a|\n|-|\n" + "| row of | cells |\n" * 50 + "|x|\n\n| h |\n| -: |\n| b |",
+        "- a\n- b\n  - c\n  - d\n    - e\n- f\n\nx",
+        "1. a\n   - b\n     1) c\n\t- d\n* e\n  * *f*\n - - g\n\n10. h\n\n",
+        "".join(f"{' ' * i}- item {i}\n" for i in range(30)) + "".join(f"{' ' * i}1. item\n" for i in range(30, 0, -3)),
+    ],
+)
+@pytest.mark.parametrize("parser_class", [Parser, LineParser])
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 1000])
+def test_scan_contents(data, parser_class, chunk_size):
+    parser = parser_class("gfm")
+    for start in range(0, len(data), chunk_size):
+        parser.feed(data[start : start + chunk_size])
+    parser.finish()
+    # contents read at once are the same as contents read one character at a time
+    assert str(parser._tree) == str(parse_by_char(data))
+
+
+@pytest.mark.parametrize(
+    ("paragraph", "read"),
+    [
+        ("*emph* and **strong**", True),
+        ("**a *b* c**\nd *e **f** g*", True),
+        ("*not closed", False),
+        ("a *", False),
+    ],
+)
+def test_emphasis_reader(paragraph, read):
+    block = EmphasisReader.read(paragraph, load_grammar("gfm"))
+    assert (block is not None) == read
+    if read:
+        assert str(block) == str(parse_by_char(paragraph + "\n\n")[0])
+
+
+def test_emphasis_reader_implements_grammar():
+    # the reader follows the patterns declared in tokens.py, it has to be changed with them
+    assert EmphasisReader.implements(load_grammar("gfm"))
+
+
+def test_emphasis_reader_other_grammar(monkeypatch):
+    # Strong declared with other delimiters, which the reader does not implement
+    monkeypatch.setitem(gfm_tokens.declared_tokens, ast.Strong, (r"__", True))
+    monkeypatch.setitem(gfm_tokens.declared_ends, ast.Strong, r"__")
+    grammar = Grammar("gfm")
+    assert not EmphasisReader.implements(grammar) and EmphasisReader.read("*a* __b__", grammar) is None
+
+    # its paragraphs are processed character by character
+    monkeypatch.setattr("pyndoc.readers.parser.load_grammar", lambda lang: grammar)
+    data = "*a* __b__ c\n\n**d**\n"
+    trees = []
+    for parser_class in (Parser, LineParser):
+        parser = parser_class("gfm", compiled=False)
+        parser.feed(data)
+        parser.finish()
+        trees.append(str(parser._tree))
+    assert trees[0] == trees[1] and "Strong" in trees[0] and trees[0] != str(parse(data))
+
+
+def test_grammar_does_not_modify_blocks():
+    grammar = Grammar("gfm")
+    assert grammar.start_pattern(ast.Strong).pattern == r"\*\*"
+    assert grammar.end_pattern(ast.Plain).pattern == r"\n"
+    assert grammar.is_inline(ast.Strong) and not grammar.is_inline(ast.Table)
+    for block in (ast.Strong, ast.Para, ast.Str, ast.Space):
+        assert not {"start_pattern", "end_pattern", "pattern", "inline"} & set(vars(block))
+
+
+def test_parsers_in_threads():
+    documents = [
+        f"# header {i}\n*a{i}* **b** `c`\n\n- d\n  - e{i}\n\n| f | g |\n| - | - |\n| {i} | h |\n" for i in range(8)
+    ]
+    expected = [str(parse(data)) for data in documents]
+
+    def parse_in_chunks(data):
+        parser = Parser("gfm")
+        for char in data:
+            parser.feed(char)
+        parser.finish()
+        return str(parser._tree)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        assert list(executor.map(parse_in_chunks, documents * 4)) == expected * 4
+
+
+def test_grammar_is_loaded_once():
+    assert Parser("gfm")._grammar is Parser("gfm")._grammar is load_grammar("gfm")
+
+
+@pytest.mark.parametrize("parser_class", [Parser, LineParser])
+def test_reset(parser_class):
+    documents = ["# header\n*text*\n\n- a\n  - b", "| a | b |\n| - | - |\n| c | d |\n", "para\n\nlast `code"]
+    parser = parser_class("gfm")
+    for data in documents:
+        parser.reset()
+        blocks = parser.feed(data) + parser.finish()
+        assert blocks == parser._tree.data
+        assert str(parser._tree) == str(parse(data))
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        "# header\nparagraph with *italic* and **bold *nested*** text\n\n- list\n  1. nested\n\n",
+        "| a | b |\n| - | :-: |\n| `c` | *d* |\n\n```py\ncode\n```\n\n[a link](url) ![image](src)",
+        "  indented\tline \n\n** a * b ** c\n- - x\n\n`` code` `` end\n\n*not closed\n\nat the end",
+    ],
+)
+@pytest.mark.parametrize("parser_class", [Parser, LineParser])
+def test_compiled_parser(data, parser_class):
+    trees = []
+    for compiled in (True, False):
+        parser = parser_class("gfm", compiled=compiled)
+        for char in data:
+            parser.feed(char)
+        parser.finish()
+        trees.append(str(parser._tree))
+    assert trees[0] == trees[1]
+
+
+class CountingParser(Parser):
+    def check_start(self) -> None:
+        self.started = getattr(self, "started", 0) + 1
+        super().check_start()
+
+
+def test_compiled_parser_subclass():
+    data = "# a\n\n**b** *c*\n- d\n"
+    parser = CountingParser("gfm")
+    parser.feed(data)
+    parser.finish()
+    # the overridden method is not replaced with the generated one
+    assert parser.started == len(data) and "check_start" not in vars(parser) and "check_end" in vars(parser)
+    assert str(parser._tree) == str(parse(data))
+
+
+def test_compiled_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv(CACHE_ENV, str(tmp_path))
+    grammar = load_grammar("gfm")
+    filename = compiled_path(grammar)
+    assert os.path.dirname(filename) == str(tmp_path)
+    stale = os.path.basename(filename).replace(source_key(grammar), "0123456789abcdef")
+    kept = ["gfm_parser_other-interpreter_0123456789abcdef.py", "other" + stale[len("gfm") :]]
+    for name in (stale, *kept):
+        (tmp_path / name).write_text("# generated from older sources")
+    (tmp_path / "__pycache__").mkdir()
+    (tmp_path / "__pycache__" / f"{stale[:-3]}.{sys.implementation.cache_tag}.pyc").write_bytes(b"")
+
+    write_compiled(grammar, filename)
+    with open(filename) as fp:
+        source = fp.read()
+    assert source == generate_source(grammar)
+    assert f"SOURCE_KEY = {source_key(grammar)!r}" in source
+    # only the modules of the language generated for the same interpreter are deleted
+    assert sorted(os.listdir(tmp_path)) == sorted([os.path.basename(filename), "__pycache__", *kept])
+    assert os.listdir(tmp_path / "__pycache__") == []
+
+
+def test_compiled_module_deleted(tmp_path, monkeypatch):
+    monkeypatch.setenv(CACHE_ENV, str(tmp_path))
+    # the module is deleted by another process, before it is loaded
+    monkeypatch.setattr("pyndoc.readers.compiler.write_compiled", lambda grammar, filename: None)
+    module = load_compiled.__wrapped__("gfm")
+    assert module.SOURCE_KEY == source_key(load_grammar("gfm"))
+
+
+def test_compact_blocks():
+    blocks = parse("# header\n| a | b |\n| - | - |\n| c | d |\n\n[link](url) *text*")
+    stack = list(blocks.data)
+    while stack:
+        block = stack.pop()
+        assert not hasattr(block, "__dict__")
+        if isinstance(block, ASTCompositeBlock):
+            assert block.contents.contents is block.blocks
+            stack.extend(block.blocks)
+
+    para = ast.Para()
+    assert para._metadata is None and para.blocks == []
+    para.contents.contents = [ast.Str("a")]
+    para.contents.metadata.append("b")
+    assert para.blocks == [ast.Str("a")] and para.metadata == ["b"]
+
+
+@pytest.mark.parametrize("parser_class", [Parser, LineParser])
+def test_shared_atoms(parser_class):
+    parser = parser_class("gfm")
+    blocks = parser.feed("a b\nc d\n\n| e f | g |\n| - | - |\n| h | i |\n") + parser.finish()
+    spaces = [block for block in blocks[0].blocks if isinstance(block, ast.Space)]
+    soft_break = blocks[0].blocks[3]
+    header_cell = blocks[1].blocks[0].blocks[0].blocks[0]
+    assert len(spaces) == 2 and spaces[0] is spaces[1] is header_cell.blocks[1]
+    assert isinstance(soft_break, ast.SoftBreak) and soft_break is soft_break.__class__.shared()
+    assert spaces[0] == ast.Space() and str(spaces[0]) == "Space"
+    with pytest.raises(AttributeError):
+        spaces[0].metadata.append("metadata")
+
+    # paragraphs with emphasis are read in a single pass by the line parser
+    (emphasis,) = parser_class("gfm").feed("*a* b\nc\n\n")
+    assert emphasis.blocks[1] is spaces[0] and emphasis.blocks[3] is soft_break
+
+
+def test_flat_tree():
+    tree = FlatTree(parse("# a *b*\n- c d\n- e\n\n```py\nf\n```\n"))
+    types = [tree.types[type_id].__name__ for type_id in tree.node_types]
+    assert types == ["Header", "Str", "Space", "Emph", "Str", "BulletList", "Plain", "Str", "Space", "Str"] + [
+        "Plain",
+        "Str",
+        "CodeBlock",
+    ]
+    assert list(tree.parents) == [NO_NODE, 0, 0, 0, 3, NO_NODE, 5, 6, 6, 6, 5, 10, NO_NODE]
+    assert list(tree.first_children) == [1, NO_NODE, NO_NODE, 4, NO_NODE, 6, 7] + [NO_NODE] * 3 + [11, NO_NODE, NO_NODE]
+    assert list(tree.next_siblings) == [5, 2, 3, NO_NODE, NO_NODE, 12, 10, 8, 9] + [NO_NODE] * 4
+    assert list(tree.roots) == [0, 5, 12] and len(tree) == 3
+
+    header, bullet_list, code_block = tree
+    assert isinstance(header, ast.Header) and header.metadata == [1] and header.contents.metadata == [1]
+    assert header.blocks[2].contents.contents == [ast.Str("b")]
+    assert [tree.text(index) for index in (1, 2, 9, 11, 12)] == ["a", "", "d", "e", "f"]
+    assert isinstance(code_block, ast.CodeBlock) and code_block.metadata == ["py"]
+    assert bullet_list.contents.contents[0].blocks[2] == ast.Str("d")
+    with pytest.raises(AttributeError):
+        code_block.contents = "g"
+
+
+@pytest.mark.parametrize("parser_class", [Parser, LineParser])
+def test_flat_parser(parser_class):
+    data = "# header\n*text* [link](url)\n\n| a | b |\n| - | - |\n| c | d |\n\n1. a\n   - b\n\nend `code`"
+    parser = parser_class("gfm", flat=True)
+    blocks = []
+    for start in range(0, len(data), 3):
+        blocks += parser.feed(data[start : start + 3])
+    blocks += parser.finish()
+
+    assert isinstance(parser._tree, FlatTree)
+    assert [str(block) for block in blocks] == [str(block) for block in parse(data)]
+    assert str(parser._tree) == str(parse(data))
+
+
+def test_text_spans():
+    code = ast.CodeBlock()
+    text = "x" * 1000
+    code.append_span("abc", 0, 2)
+    code.append_span(text, 1, 601)
+    code.append_span("def", 1, 3)
+    code.append_span("g", 0, 1)
+    assert code.spans() == [("ab", 0, 2), (text, 1, 601), ("efg", 0, 3)]
+    assert code.ending(5) == "xxefg" and code.ending(700) == "ab" + "x" * 600 + "efg"
+    assert code.contents == "ab" + "x" * 600 + "efg"
+    assert code.spans() == [(code.contents, 0, 605)]
+
+
+@pytest.mark.parametrize("parser_class", [Parser, LineParser])
+def test_code_block_spans(parser_class):
+    body = "".join(f"line {index}\n" for index in range(1000))
+    data = f"```py\n{body}```\n\nend"
+    parser = parser_class("gfm")
+    for start in range(0, len(data), 512):
+        parser.feed(data[start : start + 512])
+    parser.finish()
+
+    code_block = parser._tree[0]
+    assert code_block.contents == body[:-1] and code_block.metadata == ["py"]
+    assert str(parser._tree) == str(parse(data))
+
+
+@pytest.mark.parametrize("parser_class", [Parser, LineParser])
+def test_text_runs(parser_class):
+    data = "# a header\nsome *emphasised words* and\na [link](url)\n\n| a b | c |\n| - | - |\n| d | e |\n\n- x y\n  - z"
+    parser = parser_class("gfm", text_runs=True)
+    header, para, table, bullet_list = parser.feed(data) + parser.finish()
+
+    assert header.blocks == [ast.Text("a header")]
+    assert para.blocks[0] == ast.Text("some ") and para.blocks[2] == ast.Text(" and\na ")
+    assert para.blocks[1].blocks == [ast.Text("emphasised words")]
+    assert bullet_list.blocks[0].blocks[0] == ast.Text("x y")
+    assert table.blocks[0].blocks[0].blocks[0].blocks == [ast.Text("a b")]
+
+    def expanded(blocks):
+        for block in expand(blocks):
+            if isinstance(block, ASTCompositeBlock):
+                block.blocks = list(expanded(block.blocks))
+            yield block
+
+    assert "\n".join(str(block) for block in expanded(parser._tree)) == "\n".join(str(block) for block in parse(data))
+
+
+def test_adjacent_str_runs():
+    para = ast.Para()
+    para.blocks = [ast.Str("a"), ast.Str("+"), ast.Space(), ast.Str("b"), ast.SoftBreak(), ast.Code(), ast.Str("c")]
+    coalesce(para)
+    assert para.blocks == [ast.Text("a"), ast.Text("+ b\n"), ast.Code(), ast.Text("c")]
+    assert list(expand(para.blocks)) == [
+        ast.Str("a"),
+        ast.Str("+"),
+        ast.Space(),
+        ast.Str("b"),
+        ast.SoftBreak(),
+        ast.Code(),
+        ast.Str("c"),
+    ]
@@ -1,6 +1,12 @@
 import pytest
+import io
+import asyncio
+import os
 import functools
+import pickle
 from pyndoc.readers.reader import Reader
+from pyndoc.readers.parser import CHECKPOINT_MAGIC, CHECKPOINT_VERSION, Parser
+from pyndoc.readers.line_parser import LineParser
 import pyndoc.ast.blocks as ast
 
 
@@ -220,6 +226,41 @@ def test_nested_inlines(gfm_reader, mocker, data, outside_type, nested_type, pos
     assert isinstance(outside_inline.contents.contents[pos_idx], nested_type)
 
 
+@pytest.mark.parametrize(
+    ("data", "pos_idx", "type", "target", "blocks"),
+    [
+        ("[a link](http://a.b/c)", 0, ast.Link, "http://a.b/c", [ast.Str("a"), ast.Space(), ast.Str("link")]),
+        ("see![image](img.png).", 1, ast.Image, "img.png", [ast.Str("image")]),
+        ("[a [b](c) d](e)", 2, ast.Link, "c", [ast.Str("b")]),
+        ("[![image](img.png)](url)", 0, ast.Link, "url", [ast.Image()]),
+        ("*[](empty)*", 0, ast.Emph, None, [ast.Link()]),
+    ],
+)
+@mock_file
+def test_links(gfm_reader, mocker, data, pos_idx, type, target, blocks):
+    gfm_reader.read("Foo")
+    link = gfm_reader._parser._tree[0].contents.contents[pos_idx]
+    assert isinstance(link, type)
+    if target:
+        assert link.contents.metadata == [target]
+    types = [block.__class__.__name__ for block in link.contents.contents]
+    assert types == [block.__class__.__name__ for block in blocks]
+    words = [block for block in link.contents.contents if isinstance(block, ast.Str)]
+    assert words == [block for block in blocks if isinstance(block, ast.Str)]
+
+
+@pytest.mark.parametrize(
+    "data",
+    ["[not a link] (url)", "[[[ ]]] (]", "[a](url with spaces)", "](url) [a]", "[a](" + "x" * 2000 + ")"],
+)
+@mock_file
+def test_unmatched_brackets(mocker, data):
+    reader = Reader("gfm")
+    reader.read("Foo")
+    words = [block.contents for block in reader._parser._tree[0].contents.contents if isinstance(block, ast.Str)]
+    assert words == data.split()
+
+
 @pytest.mark.parametrize(
     ("data", "plain_amt", "plain_content_amt"),
     [
@@ -336,3 +377,203 @@ def test_code_contents(gfm_reader, mocker, data, contents):
     code_block = gfm_reader._parser._tree[0].contents.contents[0]
     print(code_block)
     assert code_block.contents == contents
+
+
+@pytest.mark.parametrize(
+    ("data", "block_size"),
+    [
+        ("# header\nparagraph with *italic* text\n\n- list\n  - nested", 1),
+        ("| a | b |\n| - | :-: |\n| c | d |\n\n```py\ncode\n```", 3),
+        ("**bold** and `code` here\nnext line", 7),
+    ],
+)
+@mock_file
+def test_block_size(mocker, data, block_size):
+    default_reader = Reader("gfm")
+    default_reader.read("Foo")
+    chunked_reader = Reader("gfm", block_size=block_size)
+    chunked_reader.read("Foo")
+    assert str(chunked_reader._parser._tree) == str(default_reader._parser._tree)
+
+
+def test_invalid_block_size():
+    with pytest.raises(ValueError):
+        Reader("gfm", block_size=0)
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        "# header\nparagraph with *italic* text\n\n- list\n  - nested",
+        "windows\r\nline endings\r\n\r\n**bold** ä€ text",
+        "",
+    ],
+)
+def test_mmap_read(tmp_path, data):
+    path = tmp_path / "input.md"
+    path.write_bytes(data.encode("utf-8"))
+
+    default_reader = Reader("gfm", encoding="utf-8")
+    default_reader.read(str(path))
+    mmap_reader = Reader("gfm", block_size=2, use_mmap=True, encoding="utf-8")
+    mmap_reader.read(str(path))
+    assert str(mmap_reader._parser._tree) == str(default_reader._parser._tree)
+
+
+def test_mmap_read_non_regular_file():
+    mmap_reader = Reader("gfm", use_mmap=True)
+    mmap_reader.read(os.devnull)
+    assert len(mmap_reader._parser._tree) == 0
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        "# header\nparagraph with *italic* text\n\n- list\n  - nested",
+        "| a | b |\n| - | :-: |\n| c | d |\n\n```py\ncode\n```",
+        "**bold** ä€ and `code`",
+    ],
+)
+@mock_file
+def test_read_string_and_stream(mocker, data):
+    file_reader = Reader("gfm")
+    file_reader.read("Foo")
+    expected = str(file_reader._parser._tree)
+
+    string_reader = Reader("gfm")
+    string_reader.read_string(data)
+    assert str(string_reader._parser._tree) == expected
+
+    text_stream_reader = Reader("gfm", block_size=3)
+    text_stream_reader.read_stream(io.StringIO(data))
+    assert str(text_stream_reader._parser._tree) == expected
+
+    binary_stream_reader = Reader("gfm", block_size=3, encoding="utf-8")
+    binary_stream_reader.read_stream(io.BytesIO(data.encode("utf-8")))
+    assert str(binary_stream_reader._parser._tree) == expected
+
+
+def test_reader_reset():
+    documents = ["# header\n\n- list\n  - nested", "*emph* and **strong**", "```py\ncode\n```\n"]
+    reused_reader = Reader("gfm")
+    for data in documents:
+        reused_reader.reset()
+        reused_reader.read_string(data)
+
+        new_reader = Reader("gfm")
+        new_reader.read_string(data)
+        assert str(reused_reader._parser._tree) == str(new_reader._parser._tree)
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        "# changelog\n\n- entry 1\n- entry 2\n\nnew paragraph",
+        "para with *unfinished italic* and `code` spans\r\nmore\r\n\r\n``in `line` code``",
+        "1. item\n\t- nested **bold**\n2. item\n\ntext ä€ end\n```py\ncode\n```",
+        "prose paragraph\nwith two lines\n\nand another one\n\n\nlast one",
+    ],
+)
+@pytest.mark.parametrize("parser_class", [Parser, LineParser])
+@pytest.mark.parametrize("flat", [False, True])
+def test_read_appended(tmp_path, data, parser_class, flat):
+    path = tmp_path / "log.md"
+    checkpoint = str(tmp_path / "log.checkpoint")
+    data = data.encode("utf-8")
+    # the file can also end within a character, which is still being written
+    cuts = [size for size in range(1, len(data)) if data[size] & 0xC0 == 0x80]
+
+    for size in sorted({*range(1, len(data), 3), *cuts, len(data)}):
+        path.write_bytes(data[:size])
+        appended_reader = Reader("gfm", block_size=4, encoding="utf-8", parser_class=parser_class, flat=flat)
+        appended_reader.read_appended(str(path), checkpoint)
+        reader = Reader("gfm", encoding="utf-8")
+        reader.read_stream(io.BytesIO(data[:size].decode("utf-8", errors="ignore").encode("utf-8")))
+        assert str(appended_reader._parser._tree) == str(reader._parser._tree)
+
+
+def test_read_appended_changed_file(tmp_path):
+    path = tmp_path / "log.md"
+    checkpoint = str(tmp_path / "log.checkpoint")
+    path.write_text("# old header\n\nold text")
+    Reader("gfm").read_appended(str(path), checkpoint)
+
+    path.write_text("# new header\n\nnew text, longer than before")
+    reader = Reader("gfm")
+    reader.read_appended(str(path), checkpoint)
+    assert reader._parser._tree[0].contents.contents[0] == ast.Str("new")
+
+
+def _unreadable():
+    raise AttributeError("the block can not be restored")
+
+
+class UnreadableBlock:
+    # a block pickled in a layout, from which the current blocks can not be restored
+    def __reduce__(self):
+        return _unreadable, ()
+
+
+OLD_CHECKPOINT = pickle.dumps({"version": 3, "tree": UnreadableBlock(), "offset": 4, "fingerprint": b"text"})
+OTHER_VERSION_CHECKPOINT = (
+    CHECKPOINT_MAGIC + pickle.dumps({"version": CHECKPOINT_VERSION - 1}) + pickle.dumps(UnreadableBlock())
+)
+
+
+@pytest.mark.parametrize("contents", [OLD_CHECKPOINT, OTHER_VERSION_CHECKPOINT], ids=["old", "other_version"])
+def test_load_incompatible_checkpoint(tmp_path, contents):
+    checkpoint = tmp_path / "log.checkpoint"
+    checkpoint.write_bytes(contents)
+    # the checkpoint is rejected before its state is loaded
+    with pytest.raises(ValueError):
+        Parser("gfm").load_checkpoint(str(checkpoint))
+
+
+@pytest.mark.parametrize(
+    "contents",
+    [OLD_CHECKPOINT, OTHER_VERSION_CHECKPOINT, CHECKPOINT_MAGIC + b"damaged", b""],
+    ids=["old", "other_version", "damaged", "empty"],
+)
+def test_read_appended_incompatible_checkpoint(tmp_path, contents):
+    path = tmp_path / "log.md"
+    checkpoint = tmp_path / "log.checkpoint"
+    path.write_text("# header\n\ntext")
+    checkpoint.write_bytes(contents)
+
+    appended_reader = Reader("gfm")
+    appended_reader.read_appended(str(path), str(checkpoint))
+    reader = Reader("gfm")
+    reader.read(str(path))
+    assert str(appended_reader._parser._tree) == str(reader._parser._tree)
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        "# header\nparagraph with *italic* text\n\n- list\n  - nested",
+        "**bold** ä€ and `code`\r\nnext line",
+    ],
+)
+def test_read_async(data):
+    string_reader = Reader("gfm")
+    string_reader.read_string(data)
+    stream_reader = Reader("gfm", encoding="utf-8")
+    stream_reader.read_stream(io.BytesIO(data.encode("utf-8")))
+
+    async def chunks():
+        for start in range(0, len(data), 3):
+            yield data[start : start + 3]
+
+    async def read_stream_reader(reader):
+        stream = asyncio.StreamReader()
+        stream.feed_data(data.encode("utf-8"))
+        stream.feed_eof()
+        await reader.read_async(stream)
+
+    iterable_reader = Reader("gfm", block_size=2)
+    asyncio.run(iterable_reader.read_async(chunks()))
+    assert str(iterable_reader._parser._tree) == str(string_reader._parser._tree)
+
+    async_stream_reader = Reader("gfm", block_size=5, encoding="utf-8")
+    asyncio.run(read_stream_reader(async_stream_reader))
+    assert str(async_stream_reader._parser._tree) == str(stream_reader._parser._tree)
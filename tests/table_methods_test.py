@@ -100,3 +100,23 @@ def test_format_row(row, alignment, row_size):
     assert len(row.contents.contents) == row_size
     for cell, align in zip(row.contents.contents, alignment):
         assert cell.contents.metadata[0] == align
+
+
+@pytest.mark.parametrize(
+    ("text", "contents"),
+    [
+        ("a", [Str("a")]),
+        (" a ", [Str("a")]),
+        (" a", [Space(), Str("a")]),
+        ("a  b   ", [Str("a"), Space(), Str("b")]),
+        ("  first cell", [Str("first"), Space(), Str("cell")]),
+        ("   ", []),
+    ],
+)
+def test_read_cell(text, contents):
+    assert Cell.read_cell(text).contents.contents == contents
+
+
+def test_read_row():
+    row = Row.read_row([" a ", "b c"])
+    assert [cell.contents.contents for cell in row.contents.contents] == [[Str("a")], [Str("b"), Space(), Str("c")]]